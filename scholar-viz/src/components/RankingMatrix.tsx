@@ -2,7 +2,7 @@
 
 import { useState, useMemo } from 'react';
 import Link from 'next/link';
-import earlyCareerData from '@/data/earlyCareer.json';
+import rankMatrixData from '@/data/rankMatrix.json';
 
 interface Scholar {
   id: string;
@@ -33,11 +33,24 @@ interface MetricConfig {
   tooltip: string;
 }
 
-// Build name to first publication year mapping
-const firstPubYearMap: Record<string, number> = {};
-earlyCareerData.forEach((s: { name: string; firstPubYear: number }) => {
-  firstPubYearMap[s.name] = s.firstPubYear;
-});
+// Ranks, derived metrics and sort orders are precomputed by scripts/materialize_rankings.py
+interface RankMatrixEntry {
+  efficiency: number;
+  m_index: number;
+  academicAge: number | null;
+  ranks: Record<MetricKey, number>;
+  topPct: Record<MetricKey, number | null>;
+  composite: Record<string, number>;
+}
+
+interface RankMatrix {
+  total: number;
+  mIndexTotal: number;
+  scholars: Record<string, RankMatrixEntry>;
+  orders: Record<string, string[]>;
+}
+
+const rankMatrix = rankMatrixData as unknown as RankMatrix;
 
 const METRICS: MetricConfig[] = [
   // Primary metrics (most important for stature)
@@ -110,6 +123,7 @@ const METRICS: MetricConfig[] = [
 ];
 
 // Weighting schemes for different purposes
+// (composite orders are precomputed with these weights in scripts/materialize_rankings.py)
 type WeightingScheme = 'stature' | 'advisor' | 'legacy';
 
 interface WeightConfig {
@@ -350,120 +364,38 @@ export function RankingMatrix({ scholars }: RankingMatrixProps) {
   const [showTop, setShowTop] = useState<number>(50);
   const [weightingScheme, setWeightingScheme] = useState<WeightingScheme>('stature');
 
-  const currentYear = new Date().getFullYear();
-
-  // Calculate rankings for each metric
+  // Look up precomputed rankings and orders
   const { scholarsWithRankings, rankings, compositeRankings } = useMemo(() => {
-    // Add efficiency and m_index metrics
-    const scholarsWithMetrics: ExtendedScholar[] = scholars.map(s => {
-      const firstPubYear = firstPubYearMap[s.name];
-      const academicAge = firstPubYear ? currentYear - firstPubYear : null;
-      const mIndex = academicAge && academicAge > 0 && s.h_index > 0 ? s.h_index / academicAge : 0;
-
-      return {
-        ...s,
-        efficiency: s.works_count > 0 ? s.cited_by_count / s.works_count : 0,
-        m_index: mIndex,
-        academicAge
-      };
-    });
-
-    // Calculate rankings for each metric
+    const byId = new Map(scholars.map(s => [s.id, s]));
     const rankingsMap: Record<string, Record<MetricKey, number>> = {};
-
-    METRICS.forEach(metric => {
-      // For m_index, only rank scholars with data
-      const validScholars = metric.key === 'm_index'
-        ? scholarsWithMetrics.filter(s => s.m_index > 0)
-        : scholarsWithMetrics;
-
-      const sorted = [...validScholars].sort((a, b) => {
-        const aVal = a[metric.key as keyof ExtendedScholar] as number;
-        const bVal = b[metric.key as keyof ExtendedScholar] as number;
-        return bVal - aVal;
-      });
-
-      sorted.forEach((scholar, idx) => {
-        if (!rankingsMap[scholar.id]) {
-          rankingsMap[scholar.id] = {} as Record<MetricKey, number>;
-        }
-        rankingsMap[scholar.id][metric.key] = idx + 1;
-      });
-
-      // For m_index, set scholars without data to 0 (no ranking)
-      if (metric.key === 'm_index') {
-        scholarsWithMetrics.forEach(s => {
-          if (!rankingsMap[s.id]) {
-            rankingsMap[s.id] = {} as Record<MetricKey, number>;
-          }
-          if (s.m_index === 0) {
-            rankingsMap[s.id][metric.key] = 0;
-          }
-        });
-      }
-    });
-
-    // Calculate composite score (based on normalized rankings)
-    const weights = WEIGHTING_SCHEMES[weightingScheme].weights;
-    const totalScholars = scholars.length;
-    const mIndexScholars = scholarsWithMetrics.filter(s => s.m_index > 0).length;
-
-    const compositeScores: Record<string, number> = {};
-    scholarsWithMetrics.forEach(scholar => {
-      let score = 0;
-      let totalWeight = 0;
-
-      METRICS.forEach(metric => {
-        const weight = weights[metric.key];
-        if (weight > 0) {
-          const rank = rankingsMap[scholar.id][metric.key];
-          if (rank > 0) {
-            // Normalize ranking to 0-1 score (higher rank = higher score)
-            const maxRank = metric.key === 'm_index' ? mIndexScholars : totalScholars;
-            const normalizedScore = 1 - (rank - 1) / maxRank;
-            score += normalizedScore * weight;
-            totalWeight += weight;
-          }
-        }
-      });
-
-      compositeScores[scholar.id] = totalWeight > 0 ? score / totalWeight : 0;
-    });
-
-    // Calculate composite rankings
     const compositeRanks: Record<string, number> = {};
-    const sortedByComposite = [...scholarsWithMetrics].sort(
-      (a, b) => compositeScores[b.id] - compositeScores[a.id]
-    );
-    sortedByComposite.forEach((scholar, idx) => {
-      compositeRanks[scholar.id] = idx + 1;
-    });
 
-    // Sort by selected metric or composite score
-    let sortedScholars: ExtendedScholar[];
-    if (sortBy === 'composite') {
-      sortedScholars = sortedByComposite;
-    } else {
-      sortedScholars = [...scholarsWithMetrics].sort((a, b) => {
-        const rankA = rankingsMap[a.id][sortBy];
-        const rankB = rankingsMap[b.id][sortBy];
-        // For m_index, put scholars without data at the end
-        if (rankA === 0) return 1;
-        if (rankB === 0) return -1;
-        return rankA - rankB;
+    const order = rankMatrix.orders[sortBy === 'composite' ? `composite:${weightingScheme}` : sortBy] || [];
+    const sortedScholars: ExtendedScholar[] = [];
+    order.forEach(id => {
+      const scholar = byId.get(id);
+      const entry = rankMatrix.scholars[id];
+      if (!scholar || !entry) return;
+      rankingsMap[id] = entry.ranks;
+      compositeRanks[id] = entry.composite[weightingScheme];
+      sortedScholars.push({
+        ...scholar,
+        efficiency: entry.efficiency,
+        m_index: entry.m_index,
+        academicAge: entry.academicAge
       });
-    }
+    });
 
     return {
       scholarsWithRankings: sortedScholars,
       rankings: rankingsMap,
       compositeRankings: compositeRanks
     };
-  }, [scholars, sortBy, weightingScheme, currentYear]);
+  }, [scholars, sortBy, weightingScheme]);
 
   const displayScholars = scholarsWithRankings.slice(0, showTop);
-  const total = scholars.length;
-  const mIndexTotal = scholars.filter(s => firstPubYearMap[s.name]).length;
+  const total = rankMatrix.total;
+  const mIndexTotal = rankMatrix.mIndexTotal;
 
   return (
     <div className="space-y-6">
@@ -60,21 +60,11 @@ export function ScholarTable({ scholars }: ScholarTableProps) {
 
   const getCategoryBadge = (category: string) => {
     const colors: Record<string, string> = {
-      'Deep Learning & Neuro': 'bg-purple-100 text-purple-800',
-      'Computational Cognition': 'bg-green-100 text-green-800',
-      'Bayesian & Statistical Neuro': 'bg-blue-100 text-blue-800',
-      'Systems Neuroscience': 'bg-orange-100 text-orange-800',
-      'Neural Dynamics & Modeling': 'bg-pink-100 text-pink-800',
-      'Theoretical Neuroscience': 'bg-indigo-100 text-indigo-800',
-      'Network & Connectome': 'bg-cyan-100 text-cyan-800',
-      'Visual & Perceptual Computation': 'bg-amber-100 text-amber-800',
-      'Motor Control & Sensorimotor': 'bg-lime-100 text-lime-800',
-      'Methods & Tools': 'bg-rose-100 text-rose-800',
+      'AI & Machine Learning': 'bg-purple-100 text-purple-800',
       'Cognitive Neuroscience': 'bg-teal-100 text-teal-800',
-      'Consciousness & Philosophy': 'bg-violet-100 text-violet-800',
-      'Auditory Computation': 'bg-emerald-100 text-emerald-800',
-      'AI Research': 'bg-fuchsia-100 text-fuchsia-800',
-      'Neurotech & AI': 'bg-sky-100 text-sky-800',
+      'Visual Neuroscience': 'bg-amber-100 text-amber-800',
+      'Network Neuroscience': 'bg-cyan-100 text-cyan-800',
+      'Motor Control': 'bg-lime-100 text-lime-800',
       'Computational Neuroscience': 'bg-gray-100 text-gray-800'
     };
     return colors[category] || 'bg-gray-100 text-gray-800';
@@ -1,5 +1,6 @@
 import scholarsData from './scholars.json';
 import earlyCareerData from './earlyCareer.json';
+import aggregatesData from './aggregates.json';
 
 export interface Scholar {
   id: string;
@@ -85,43 +86,37 @@ export function getStatistics() {
   };
 }
 
+// Precomputed rollups (scripts/aggregate_cube.py), rows sorted by scholar count
+interface RollupTable {
+  columns: string[];
+  rows: (string | number)[][];
+}
+
+const rollups = aggregatesData as unknown as Record<string, RollupTable>;
+
+function rollupCounts(name: string) {
+  return rollups[name].rows.map(row => ({ value: String(row[0]), count: Number(row[1]) }));
+}
+
 // Get country distribution
 export function getCountryDistribution() {
-  const counts: Record<string, number> = {};
-  scholars.forEach(s => {
-    if (s.country) {
-      counts[s.country] = (counts[s.country] || 0) + 1;
-    }
-  });
-  return Object.entries(counts)
-    .map(([country, count]) => ({ country, count }))
-    .sort((a, b) => b.count - a.count);
+  return rollupCounts('by_country')
+    .filter(r => r.value)
+    .map(r => ({ country: r.value, count: r.count }));
 }
 
 // Get institution distribution
 export function getInstitutionDistribution() {
-  const counts: Record<string, number> = {};
-  scholars.forEach(s => {
-    if (s.institution) {
-      counts[s.institution] = (counts[s.institution] || 0) + 1;
-    }
-  });
-  return Object.entries(counts)
-    .map(([institution, count]) => ({ institution, count }))
-    .sort((a, b) => b.count - a.count)
+  return rollupCounts('by_institution')
+    .filter(r => r.value)
+    .map(r => ({ institution: r.value, count: r.count }))
     .slice(0, 15);
 }
 
 // Get category distribution
 export function getCategoryDistribution() {
-  const counts: Record<string, number> = {};
-  scholars.forEach(s => {
-    const cat = s.category || 'Other';
-    counts[cat] = (counts[cat] || 0) + 1;
-  });
-  return Object.entries(counts)
-    .map(([category, count]) => ({ category, count }))
-    .sort((a, b) => b.count - a.count);
+  return rollupCounts('by_category')
+    .map(r => ({ category: r.value || 'Other', count: r.count }));
 }
 
 // Get top scholars
@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+Aggregation Cube
+
+Materialize a concept x country x institution x category x year cube of
+scholar counts, citation sums and citation percentiles. The concept is the
+OpenAlex field concept ID the scholar was fetched for (the first of the
+"fields" column in multi-field runs), and the year is the scholar's first
+publication year. The cube state (cells with their sketches) is persisted,
+so each refresh only applies the authors whose records changed, and it is
+exported as compact rollup tables so dashboards read precomputed groupings
+instead of scanning every author.
+
+The site rollups (../scholar-viz/src/data/aggregates.json) are built by
+materialize_rankings from the same consolidated scholars as scholars.json,
+so the dashboard distributions match the scholar table.
+
+Usage:
+    python aggregate_cube.py [scholars_csv]
+
+Dependencies:
+    pip install pandas
+"""
+
+import json
+import os
+import sys
+from itertools import combinations
+
+import pandas as pd
+
+from openalex_client import short_id
+from streaming_stats import KLLSketch
+
+DIMENSIONS = ["concept", "country", "institution", "category", "year"]
+# Rollups exported to the site (a subset of all 2^5 groupings)
+ROLLUPS = {
+    "total": [],
+    "by_country": ["country"],
+    "by_institution": ["institution"],
+    "by_category": ["category"],
+    "by_concept": ["concept"],
+    "by_year": ["year"],
+    "by_country_category": ["country", "category"],
+    "by_concept_year": ["concept", "year"],
+}
+STATE_PATH = "../data/cube_state.json"
+EARLY_CAREER_PATH = "../data/early_career_citations.csv"
+EXPORT_PATH = "../scholar-viz/src/data/aggregates.json"
+
+
+class CubeCell:
+    """Aggregates for one combination of dimension values."""
+
+    def __init__(self):
+        self.count = 0
+        self.citations = 0
+        self.h_index = 0
+        self.works = 0
+        self.sketch = KLLSketch()
+        self.dirty = False
+
+    def add(self, values):
+        self.count += 1
+        self.citations += values["citations"]
+        self.h_index += values["h_index"]
+        self.works += values["works"]
+        self.sketch.add(values["citations"])
+
+    def remove(self, values):
+        # Sketches cannot subtract, so the cell is rebuilt from its members later
+        self.count -= 1
+        self.citations -= values["citations"]
+        self.h_index -= values["h_index"]
+        self.works -= values["works"]
+        self.dirty = True
+
+    def merge(self, other):
+        self.count += other.count
+        self.citations += other.citations
+        self.h_index += other.h_index
+        self.works += other.works
+        self.sketch.merge(other.sketch)
+        return self
+
+    def to_list(self):
+        return [self.count, self.citations, self.h_index, self.works, self.sketch.to_dict()]
+
+    @classmethod
+    def from_list(cls, data):
+        cell = cls()
+        cell.count, cell.citations, cell.h_index, cell.works = data[:4]
+        cell.sketch = KLLSketch.from_dict(data[4])
+        return cell
+
+    def row(self):
+        p50, p90 = self.sketch.quantiles([0.5, 0.9]) if self.count else (0, 0)
+        return [
+            self.count,
+            self.citations,
+            round(self.citations / self.count) if self.count else 0,
+            round(self.h_index / self.count, 1) if self.count else 0,
+            round(self.works / self.count) if self.count else 0,
+            p50,
+            p90,
+        ]
+
+
+ROW_COLUMNS = ["count", "citations_sum", "citations_mean", "h_index_mean", "works_mean", "citations_p50", "citations_p90"]
+
+
+def author_cell_key(row, concept_id=""):
+    """Dimension tuple for an author record (concept_id: field the rows were fetched for, if not in the row)."""
+    fields = row.get("fields", "")
+    concept = fields.split("|")[0] if isinstance(fields, str) and fields else concept_id
+    year = row.get("first_pub_year", "")
+    year = int(year) if pd.notna(year) and year != "" else ""
+    return tuple(
+        "" if pd.isna(v) else v
+        for v in (concept, row.get("country", ""), row.get("institution", ""), row.get("category", ""), year)
+    )
+
+
+def author_values(row):
+    def num(key):
+        value = row.get(key, 0)
+        return 0 if pd.isna(value) else int(value)
+    return {"citations": num("cited_by_count"), "h_index": num("h_index"), "works": num("works_count")}
+
+
+class AggregateCube:
+    """Base cells keyed by the full dimension tuple, plus author membership for updates."""
+
+    def __init__(self):
+        self.cells = {}
+        self.members = {}  # author_id -> (cell key, values)
+
+    def upsert(self, author_id, key, values):
+        """Insert or update one author. Returns True if anything changed."""
+        previous = self.members.get(author_id)
+        if previous == (key, values):
+            return False
+        if previous:
+            self.cells[previous[0]].remove(previous[1])
+        cell = self.cells.get(key)
+        if cell is None:
+            cell = self.cells[key] = CubeCell()
+        cell.add(values)
+        self.members[author_id] = (key, values)
+        return True
+
+    def remove(self, author_id):
+        previous = self.members.pop(author_id, None)
+        if previous:
+            self.cells[previous[0]].remove(previous[1])
+
+    def update_from_dataframe(self, df, full_refresh=False, concept_id=""):
+        """Apply a batch of author rows. With full_refresh, authors not in df are dropped."""
+        changed = 0
+        seen = set()
+        for _, row in df.iterrows():
+            author_id = row["id"]
+            seen.add(author_id)
+            if self.upsert(author_id, author_cell_key(row, concept_id), author_values(row)):
+                changed += 1
+        if full_refresh:
+            for author_id in [a for a in self.members if a not in seen]:
+                self.remove(author_id)
+                changed += 1
+        self._rebuild_dirty()
+        return changed
+
+    def _rebuild_dirty(self):
+        dirty = {key for key, cell in self.cells.items() if cell.dirty}
+        if not dirty:
+            return
+        for key in dirty:
+            if self.cells[key].count <= 0:
+                del self.cells[key]
+            else:
+                self.cells[key].sketch = KLLSketch()
+                self.cells[key].dirty = False
+        for key, values in self.members.values():
+            if key in dirty and key in self.cells:
+                self.cells[key].sketch.add(values["citations"])
+
+    def rollup(self, dims):
+        """Aggregate base cells onto a subset of dimensions."""
+        idx = [DIMENSIONS.index(d) for d in dims]
+        groups = {}
+        for key, cell in self.cells.items():
+            group_key = tuple(key[i] for i in idx)
+            group = groups.get(group_key)
+            if group is None:
+                group = groups[group_key] = CubeCell()
+            group.merge(cell)
+        return groups
+
+    def rollup_table(self, dims):
+        """Compact column/row table sorted by count."""
+        rows = [list(k) + cell.row() for k, cell in self.rollup(dims).items()]
+        rows.sort(key=lambda r: r[len(dims)], reverse=True)
+        return {"columns": list(dims) + ROW_COLUMNS, "rows": rows}
+
+    def top(self, dim, n=10):
+        """Top-n values of a dimension by scholar count."""
+        table = self.rollup_table([dim])
+        return [(r[0], r[1]) for r in table["rows"] if r[0]][:n]
+
+    def save(self, path=STATE_PATH):
+        # Cells are saved with their sketches so a load restores them without replaying members
+        state = {
+            "members": {a: [list(k), v] for a, (k, v) in self.members.items()},
+            "cells": [[list(k), cell.to_list()] for k, cell in self.cells.items()],
+        }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path=STATE_PATH):
+        cube = cls()
+        if not os.path.exists(path):
+            return cube
+        with open(path, encoding="utf-8") as f:
+            state = json.load(f)
+        cube.members = {a: (tuple(k), v) for a, (k, v) in state["members"].items()}
+        if "cells" in state:
+            cube.cells = {tuple(k): CubeCell.from_list(data) for k, data in state["cells"]}
+        else:
+            # State written before cells were persisted
+            for key, values in cube.members.values():
+                cube.cells.setdefault(key, CubeCell()).add(values)
+        return cube
+
+
+def all_rollups():
+    """Every grouping of the cube dimensions, for ad-hoc use."""
+    for size in range(len(DIMENSIONS) + 1):
+        for dims in combinations(DIMENSIONS, size):
+            yield list(dims)
+
+
+def export_rollups(cube, output_path=EXPORT_PATH, rollups=ROLLUPS):
+    """Write the configured rollups as compact JSON tables for the site."""
+    tables = {name: cube.rollup_table(dims) for name, dims in rollups.items()}
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(tables, f, ensure_ascii=False, separators=(",", ":"))
+    print(f"Aggregate rollups saved to {output_path}")
+
+
+def fill_first_years(df, early_path=EARLY_CAREER_PATH, store=None):
+    """Fill missing first_pub_year (the cube's year dimension) without API calls.
+
+    Taken from the early-career stage output (by id, or by name for files
+    without an id column), then from stored works.
+    """
+    df = df.copy()
+    if "first_pub_year" not in df:
+        df["first_pub_year"] = float("nan")
+    missing = df["first_pub_year"].isna()
+    if missing.any() and os.path.exists(early_path):
+        early = pd.read_csv(early_path)
+        key = "id" if "id" in early.columns else "name"
+        years = early.drop_duplicates(key).set_index(key)["first_pub_year"]
+        df.loc[missing, "first_pub_year"] = df.loc[missing, key].map(years)
+        missing = df["first_pub_year"].isna()
+    if missing.any() and store is not None:
+        from early_career_citations import first_year_from_works
+        df.loc[missing, "first_pub_year"] = [
+            first_year_from_works(store.get_works(a)) if store.has_works(a) else None
+            for a in df.loc[missing, "id"].map(short_id)
+        ]
+    return df
+
+
+def build_cube(df, state_path=STATE_PATH, store=None, concept_id=""):
+    """Load the previous cube state, apply this refresh, and persist it (state_path=None: in memory only)."""
+    df = fill_first_years(df, store=store)
+    without_year = int(df["first_pub_year"].isna().sum())
+    if without_year:
+        print(f"  {without_year} scholars have no first publication year (empty year cell)")
+    cube = AggregateCube.load(state_path) if state_path else AggregateCube()
+    changed = cube.update_from_dataframe(df, full_refresh=True, concept_id=concept_id)
+    print(f"Aggregate cube: {len(cube.members)} scholars, {len(cube.cells)} cells, {changed} updated")
+    if state_path:
+        cube.save(state_path)
+    return cube
+
+
+def main():
+    from fetch_comp_neuro_scholars import CONCEPT_ID
+    from materialize_rankings import load_scholars
+
+    print("=" * 60)
+    print("Aggregation Cube")
+    print("=" * 60)
+
+    # Default input: the consolidated site scholars, as materialize_rankings uses
+    df = pd.read_csv(sys.argv[1]) if len(sys.argv) > 1 else load_scholars()
+    cube = build_cube(df, concept_id=CONCEPT_ID)
+    export_rollups(cube)
+
+    print("\n## Country/Region Distribution")
+    for country, count in cube.top("country"):
+        print(f"  {country}: {count} scholars")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Intra-Cohort Citation Network
+
+Build the citation network among the works of the tracked scholar set and
+measure how much of each scholar's impact comes from inside the field and
+from themselves:
+
+    self_citations            citations to the author's works from works the author co-wrote
+    citations_excl_self       total citations minus self-citations
+    in_field_citations        citations from any work in the scholar set (self excluded)
+    in_field_share            in_field_citations / citations_excl_self
+    author-to-author flows    how often scholar A's works cite scholar B's works
+
+Edges come from the referenced_works lists in the ScholarStore; works whose
+references are missing are looked up with batched 'openalex:W1|W2|...'
+queries (50 works per request) and written back into the stored work
+records, so the next run finds them there. The work citation graph and the
+work -> author incidence are kept as CSR arrays (numpy indptr / indices)
+in ../data/citation_network.npz, and author flows are computed as sparse
+joins over the edge list, so nothing is ever materialized densely.
+
+Usage:
+    python citation_network.py [--fetch-missing]
+
+Dependencies:
+    pip install numpy pandas
+"""
+
+import sys
+
+import numpy as np
+import pandas as pd
+
+from openalex_client import get_works_batched, short_id
+
+DATA_PATH = "../data/comp_neuro_scholars_raw.csv"
+NETWORK_PATH = "../data/citation_network.npz"
+AUTHORS_OUTPUT = "../data/citation_network_authors.csv"
+FLOWS_OUTPUT = "../data/citation_flows.csv"
+TOP_FLOWS = 500
+
+
+def to_csr(rows, cols, n_rows):
+    """Deduplicated CSR (indptr, indices) from COO row / column arrays."""
+    rows = np.asarray(rows, dtype=np.int64)
+    cols = np.asarray(cols, dtype=np.int64)
+    if len(rows):
+        order = np.lexsort((cols, rows))
+        rows, cols = rows[order], cols[order]
+        keep = np.ones(len(rows), dtype=bool)
+        keep[1:] = (rows[1:] != rows[:-1]) | (cols[1:] != cols[:-1])
+        rows, cols = rows[keep], cols[keep]
+    indptr = np.zeros(n_rows + 1, dtype=np.int64)
+    np.add.at(indptr, rows + 1, 1)
+    return np.cumsum(indptr), cols
+
+
+def csr_rows(indptr):
+    """Row index of every stored entry (COO rows from CSR)."""
+    return np.repeat(np.arange(len(indptr) - 1), np.diff(indptr))
+
+
+class CitationNetwork:
+    """Works of a scholar set, their in-set citation edges and author incidence."""
+
+    def __init__(self, work_ids, cites_indptr, cites_indices, author_ids, authors_indptr, authors_indices,
+                 cited_by_count):
+        self.work_ids = np.asarray(work_ids)
+        self.author_ids = np.asarray(author_ids)
+        self.cites_indptr, self.cites_indices = cites_indptr, cites_indices        # citing work -> cited works
+        self.authors_indptr, self.authors_indices = authors_indptr, authors_indices  # work -> tracked authors
+        self.cited_by_count = np.asarray(cited_by_count, dtype=np.int64)
+
+    @classmethod
+    def build(cls, store, author_ids, email=None, fetch_missing=False):
+        author_ids = sorted({short_id(a) for a in author_ids})
+        author_index = {a: i for i, a in enumerate(author_ids)}
+
+        work_ids = sorted({w for a in author_ids for w in store.author_works.get(a, ())})
+        work_index = {w: i for i, w in enumerate(work_ids)}
+        works = [store.works[w]["data"] for w in work_ids]
+
+        references = {}
+        missing = []
+        for work_id, work in zip(work_ids, works):
+            if "referenced_works" in work:
+                references[work_id] = work["referenced_works"] or []
+            else:
+                missing.append(work_id)
+        if missing and fetch_missing:
+            print(f"Fetching references for {len(missing):,} works in batches...")
+            fetched = {}
+            for work in get_works_batched(missing, select="id,referenced_works", email=email):
+                fetched[short_id(work["id"])] = work.get("referenced_works") or []
+            references.update(fetched)
+            # Keep them in the store so later runs need no lookups
+            saved = store.update_works({w: {"referenced_works": refs} for w, refs in fetched.items()})
+            print(f"  Saved references of {saved:,} works to the store")
+        elif missing:
+            print(f"  {len(missing):,} works have no referenced_works in the store (use --fetch-missing)")
+
+        # Citation edges restricted to the scholar set
+        src, dst = [], []
+        for work_id, refs in references.items():
+            i = work_index[work_id]
+            for ref in refs:
+                j = work_index.get(short_id(ref))
+                if j is not None and j != i:
+                    src.append(i)
+                    dst.append(j)
+
+        # Work -> tracked authors
+        inc_work, inc_author = [], []
+        for i, work in enumerate(works):
+            for authorship in work.get("authorships") or []:
+                a = author_index.get(short_id((authorship.get("author") or {}).get("id", "")))
+                if a is not None:
+                    inc_work.append(i)
+                    inc_author.append(a)
+
+        n = len(work_ids)
+        cites = to_csr(src, dst, n)
+        authors = to_csr(inc_work, inc_author, n)
+        cited_by = [w.get("cited_by_count") or 0 for w in works]
+        network = cls(work_ids, *cites, author_ids, *authors, cited_by)
+        print(f"Citation network: {n:,} works, {len(cites[1]):,} in-set citations, {len(author_ids):,} scholars")
+        return network
+
+    def edges(self):
+        return pd.DataFrame({"src": csr_rows(self.cites_indptr), "dst": self.cites_indices})
+
+    def incidence(self):
+        return pd.DataFrame({"work": csr_rows(self.authors_indptr), "author": self.authors_indices})
+
+    def author_flows(self):
+        """(citing author, cited author, citations) for every pair with at least one citation."""
+        inc = self.incidence()
+        flows = (self.edges()
+                 .merge(inc.rename(columns={"work": "src", "author": "citing"}), on="src")
+                 .merge(inc.rename(columns={"work": "dst", "author": "cited"}), on="dst"))
+        return flows.groupby(["citing", "cited"]).size().rename("citations").reset_index()
+
+    def author_metrics(self):
+        """Per-author self-citation, self-excluded and within-field citation counts."""
+        inc = self.incidence()
+        edges = self.edges()
+
+        total = pd.Series(self.cited_by_count[inc["work"].values], index=inc["author"].values).groupby(level=0).sum()
+
+        # Each in-set citation of an author's work, flagged if the citing work shares that author
+        received = edges.merge(inc.rename(columns={"work": "dst", "author": "cited"}), on="dst")
+        citing_pairs = pd.MultiIndex.from_arrays([inc["work"], inc["author"]])
+        received["self"] = pd.MultiIndex.from_arrays([received["src"], received["cited"]]).isin(citing_pairs)
+        self_cites = received[received["self"]].groupby("cited").size()
+        in_field = received[~received["self"]].groupby("cited").size()
+
+        metrics = pd.DataFrame(index=pd.RangeIndex(len(self.author_ids)))
+        metrics["id"] = self.author_ids
+        metrics["works_in_network"] = inc.groupby("author").size()
+        metrics["total_citations"] = total
+        metrics["self_citations"] = self_cites
+        metrics["in_field_citations"] = in_field
+        metrics = metrics.fillna(0)
+        for column in ("works_in_network", "total_citations", "self_citations", "in_field_citations"):
+            metrics[column] = metrics[column].astype(int)
+        metrics["citations_excl_self"] = (metrics["total_citations"] - metrics["self_citations"]).clip(lower=0)
+        metrics["self_citation_pct"] = (metrics["self_citations"] / metrics["total_citations"].where(metrics["total_citations"] > 0) * 100).round(2)
+        metrics["in_field_share"] = (metrics["in_field_citations"] / metrics["citations_excl_self"].where(metrics["citations_excl_self"] > 0)).round(4)
+        return metrics
+
+    def save(self, path=NETWORK_PATH):
+        np.savez_compressed(path, work_ids=self.work_ids.astype(str), author_ids=self.author_ids.astype(str),
+                            cites_indptr=self.cites_indptr, cites_indices=self.cites_indices,
+                            authors_indptr=self.authors_indptr, authors_indices=self.authors_indices,
+                            cited_by_count=self.cited_by_count)
+
+    @classmethod
+    def load(cls, path=NETWORK_PATH):
+        d = np.load(path)
+        return cls(d["work_ids"], d["cites_indptr"], d["cites_indices"], d["author_ids"],
+                   d["authors_indptr"], d["authors_indices"], d["cited_by_count"])
+
+
+def main():
+    from fetch_comp_neuro_scholars import EMAIL
+    from scholar_store import ScholarStore
+
+    print("=" * 60)
+    print("Intra-Cohort Citation Network")
+    print("=" * 60)
+
+    scholars = pd.read_csv(DATA_PATH)
+    names = dict(zip(scholars["id"].map(short_id), scholars["name"]))
+    author_ids = [a for a in names if not a.startswith("GS_")]
+
+    network = CitationNetwork.build(ScholarStore(), author_ids, EMAIL, fetch_missing="--fetch-missing" in sys.argv)
+    network.save()
+
+    metrics = network.author_metrics()
+    metrics.insert(1, "name", metrics["id"].map(names))
+    metrics.sort_values("citations_excl_self", ascending=False).to_csv(AUTHORS_OUTPUT, index=False, encoding="utf-8")
+    print(f"Author metrics saved to {AUTHORS_OUTPUT}")
+
+    flows = network.author_flows()
+    flows = flows[flows["citing"] != flows["cited"]].nlargest(TOP_FLOWS, "citations")
+    flows["citing"] = network.author_ids[flows["citing"].values]
+    flows["cited"] = network.author_ids[flows["cited"].values]
+    flows.insert(1, "citing_name", flows["citing"].map(names))
+    flows.insert(3, "cited_name", flows["cited"].map(names))
+    flows.to_csv(FLOWS_OUTPUT, index=False, encoding="utf-8")
+    print(f"Top {len(flows)} author-to-author flows saved to {FLOWS_OUTPUT}")
+
+    print("\n## Highest within-field citation share")
+    ranked = metrics[metrics["citations_excl_self"] >= 1000].sort_values("in_field_share", ascending=False)
+    for _, row in ranked.head(10).iterrows():
+        print(f"  {row['name']}: {row['in_field_share']:.1%} in-field, {row['self_citation_pct']:.1f}% self")
+
+    print("\n## Strongest citation flows")
+    for _, row in flows.head(10).iterrows():
+        print(f"  {row['citing_name']} -> {row['cited_name']}: {row['citations']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Within-Sample Field-Normalized Citation Percentiles
+
+Raw citation counts favor older scholars and older fields. This engine
+compares every work only with its cohort -- works of the same publication
+year, primary concept and work type -- and derives author indicators that
+are independent of career length:
+
+    sample_top1_share / sample_top10_share   share of an author's works in the cohort's top 1% / 10%
+    sample_mncs                              mean normalized citation score (citations / cohort mean)
+    sample_median_percentile                 median cohort percentile of the author's works
+
+The cohorts are built only from the works in the ScholarStore, i.e. the
+works of the scholars being ranked, not from all OpenAlex works of that
+year, concept and type. The indicators therefore rank scholars against
+each other: a sample of highly cited scholars pushes the cohort means up
+and the percentiles down, and they are not comparable with bibliometric
+indicators computed against a whole field. The columns carry a "sample_"
+prefix to make that explicit. median_cohort_size is the median number of
+stored works per cohort of the author's works; small values mean noisy
+indicators. A cohort smaller than 1 / share (100 works for top 1%, 10 for
+top 10%) has no top-share slot, so its works get no top-share flag and are
+left out of that author's share; an author with no such works gets NaN.
+
+Reference distributions are held as one sorted int64 array of
+(cohort << 32 | citations) keys, so all works are assigned percentiles with
+a single vectorized np.searchsorted. The tables are cached in
+../data/reference_tables.npz and updated incrementally: new works are
+merged into the sorted array, and only changed citation counts force a
+re-sort.
+
+Usage:
+    python citation_percentiles.py [--rebuild]
+
+Dependencies:
+    pip install numpy pandas
+"""
+
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from openalex_client import short_id
+
+CACHE_PATH = "../data/reference_tables.npz"
+OUTPUT_PATH = "../data/author_indicators.csv"
+COHORT_SHIFT = np.int64(32)
+TOP_SHARES = {"top1_share": 0.01, "top10_share": 0.10}
+
+
+def primary_concept(work):
+    """Highest-scoring level 0/1 concept of a work (falls back to any concept)."""
+    concepts = work.get("concepts") or []
+    candidates = [c for c in concepts if (c.get("level") or 0) <= 1] or concepts
+    if not candidates:
+        return ""
+    return max(candidates, key=lambda c: c.get("score") or 0).get("display_name", "")
+
+
+def work_frame(works):
+    """DataFrame (id, year, concept, type, cites) from raw OpenAlex works."""
+    rows = [(short_id(w["id"]), w.get("publication_year"), primary_concept(w), w.get("type") or "",
+             w.get("cited_by_count") or 0) for w in works if w.get("id")]
+    df = pd.DataFrame(rows, columns=["id", "year", "concept", "type", "cites"])
+    df = df[df["year"].notna()].drop_duplicates("id", keep="last")
+    df["year"] = df["year"].astype(int)
+    return df.set_index("id")
+
+
+class ReferenceTables:
+    """Sorted per-cohort citation distributions with vectorized percentile lookup."""
+
+    def __init__(self):
+        self.cohorts = []          # [(year, concept, type)]
+        self._cohort_index = {}
+        self.works = pd.DataFrame({"cohort": pd.Series(dtype="int64"), "cites": pd.Series(dtype="int64")})
+        self.keys = np.empty(0, dtype=np.int64)
+        self._stats = None
+
+    def _cohort_ids(self, frame):
+        # Map each distinct (year, concept, type) once, then broadcast the codes
+        combined = np.zeros(len(frame), dtype=np.int64)
+        levels = []
+        for column in ("year", "concept", "type"):
+            column_codes, column_values = pd.factorize(frame[column])
+            combined = combined * len(column_values) + column_codes
+            levels.append(column_values)
+        codes, uniques = pd.factorize(combined)
+
+        mapping = []
+        for code in uniques:
+            c, t = divmod(code, len(levels[2]))
+            y, c = divmod(c, len(levels[1]))
+            key = (int(levels[0][y]), levels[1][c], levels[2][t])
+            idx = self._cohort_index.get(key)
+            if idx is None:
+                idx = self._cohort_index[key] = len(self.cohorts)
+                self.cohorts.append(key)
+            mapping.append(idx)
+        return np.asarray(mapping, dtype=np.int64)[codes]
+
+    @staticmethod
+    def _keys(cohorts, cites):
+        return (np.asarray(cohorts, dtype=np.int64) << COHORT_SHIFT) | np.asarray(cites, dtype=np.int64)
+
+    def update(self, frame):
+        """Add new works and apply changed citation counts. Returns (added, changed)."""
+        incoming = pd.DataFrame({"cohort": self._cohort_ids(frame), "cites": frame["cites"].astype("int64").values},
+                                index=frame.index)
+        known = incoming.index.isin(self.works.index)
+        added = incoming[~known]
+        existing = incoming[known]
+        changed = existing[(self.works.loc[existing.index] != existing).any(axis=1)]
+
+        if len(changed):
+            self.works.loc[changed.index] = changed
+            self.works = pd.concat([self.works, added])
+            self.keys = np.sort(self._keys(self.works["cohort"], self.works["cites"]))
+        elif len(added):
+            self.works = pd.concat([self.works, added])
+            new_keys = np.sort(self._keys(added["cohort"], added["cites"]))
+            self.keys = np.insert(self.keys, np.searchsorted(self.keys, new_keys), new_keys)
+        if len(added) or len(changed):
+            self._stats = None
+        return len(added), len(changed)
+
+    def cohort_stats(self):
+        """(start offset, size, mean citations) arrays indexed by cohort."""
+        if self._stats is None:
+            n = len(self.cohorts)
+            bounds = np.searchsorted(self.keys, np.arange(n + 1, dtype=np.int64) << COHORT_SHIFT)
+            sizes = np.diff(bounds)
+            totals = np.bincount(self.works["cohort"].values, weights=self.works["cites"].values, minlength=n)
+            means = np.divide(totals, sizes, out=np.zeros(n), where=sizes > 0)
+            self._stats = (bounds[:-1], sizes, means)
+        return self._stats
+
+    def percentiles(self, frame=None):
+        """Cohort percentile, top-share flags and normalized score for works (default: all known works)."""
+        works = self.works if frame is None else self.works.loc[frame.index.intersection(self.works.index)]
+        cohort = works["cohort"].values
+        cites = works["cites"].values
+        starts, sizes, means = self.cohort_stats()
+
+        keys = self._keys(cohort, cites)
+        below = np.searchsorted(self.keys, keys, side="left") - starts[cohort]
+        at_or_below = np.searchsorted(self.keys, keys, side="right") - starts[cohort]
+        size = sizes[cohort]
+
+        result = pd.DataFrame({
+            "cohort_size": size,
+            # Midpoint percentile: ties share the same rank
+            "percentile": (below + at_or_below) / 2 / size * 100,
+            "ncs": np.divide(cites, means[cohort], out=np.zeros(len(cites)), where=means[cohort] > 0),
+        }, index=works.index)
+        above = size - at_or_below
+        for column, share in TOP_SHARES.items():
+            flag = ((above < share * size) & (cites > 0)).astype(float)
+            # A cohort smaller than 1/share has no top-share slot: leave the flag undefined
+            result[column] = np.where(size >= round(1 / share), flag, np.nan)
+        return result
+
+    def save(self, path=CACHE_PATH):
+        np.savez_compressed(
+            path,
+            cohorts=np.array([json.dumps(c) for c in self.cohorts]),
+            work_ids=np.asarray(self.works.index, dtype=str),
+            work_cohort=self.works["cohort"].values,
+            work_cites=self.works["cites"].values,
+            keys=self.keys,
+        )
+
+    @classmethod
+    def load(cls, path=CACHE_PATH):
+        tables = cls()
+        if not os.path.exists(path):
+            return tables
+        data = np.load(path)
+        tables.cohorts = [tuple(json.loads(c)) for c in data["cohorts"]]
+        tables._cohort_index = {c: i for i, c in enumerate(tables.cohorts)}
+        tables.works = pd.DataFrame({"cohort": data["work_cohort"], "cites": data["work_cites"]},
+                                    index=pd.Index(data["work_ids"], name="id"))
+        tables.keys = data["keys"]
+        return tables
+
+
+def author_indicators(tables, author_works):
+    """Per-author within-sample indicators from {author_id: work ids}."""
+    pairs = pd.DataFrame([(a, w) for a, ids in author_works.items() for w in ids], columns=["author", "id"])
+    scored = pairs.merge(tables.percentiles(), left_on="id", right_index=True)
+    grouped = scored.groupby("author")
+    indicators = pd.DataFrame({
+        "normalized_works": grouped.size(),
+        "median_cohort_size": grouped["cohort_size"].median(),
+        "sample_mncs": grouped["ncs"].mean().round(3),
+        "sample_median_percentile": grouped["percentile"].median().round(1),
+    })
+    for column in TOP_SHARES:
+        indicators[f"sample_{column}"] = grouped[column].mean().round(3)
+    indicators.index.name = "id"
+    return indicators
+
+
+def update_from_store(store, tables=None, cache_path=CACHE_PATH):
+    """Bring the cached reference tables up to date with the store's works."""
+    tables = tables if tables is not None else ReferenceTables.load(cache_path)
+    frame = work_frame(record["data"] for record in store.works.values())
+    added, changed = tables.update(frame)
+    print(f"Reference tables: {len(tables.works):,} works in {len(tables.cohorts):,} cohorts "
+          f"({added:,} added, {changed:,} changed)")
+    if added or changed:
+        tables.save(cache_path)
+    return tables
+
+
+def main():
+    from scholar_store import ScholarStore
+
+    print("=" * 60)
+    print("Within-Sample Field-Normalized Citation Percentiles")
+    print("=" * 60)
+
+    store = ScholarStore()
+    tables = ReferenceTables() if "--rebuild" in sys.argv else None
+    tables = update_from_store(store, tables)
+
+    indicators = author_indicators(tables, store.author_works)
+    indicators = indicators.sort_values("sample_mncs", ascending=False)
+    indicators.to_csv(OUTPUT_PATH, encoding="utf-8")
+    print(f"\nIndicators for {len(indicators)} authors saved to {OUTPUT_PATH}")
+    print(f"Cohorts hold only the {len(tables.works):,} stored works; scores rank these scholars against each other")
+
+    print("\n## Top 10 by within-sample mean normalized citation score")
+    for author_id, row in indicators.head(10).iterrows():
+        print(f"  {author_id}: MNCS {row['sample_mncs']:.2f}, top 10% share {row['sample_top10_share']:.0%}, "
+              f"top 1% share {row['sample_top1_share']:.0%} ({row['normalized_works']} works)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+Split-Profile Consolidation
+
+OpenAlex often splits one person across several author IDs, and the
+Google Scholar merge adds placeholder GS_... IDs for people it could not
+match. This stage clusters author IDs that belong to the same person with
+union-find and merges their works and metrics before ranking.
+
+Evidence, all found through blocking keys (no pairwise comparison):
+    orcid                       same ORCID -> same person
+    full name + institution     same full name key ("terrence sejnowski")
+                                and the same institution: equal OpenAlex
+                                institution IDs or equal normalized names
+    name + co-authors           same loose name key ("t sejnowski") and at
+                                least MIN_SHARED_COAUTHORS co-authors in
+                                common (from the works store)
+
+The loose name key alone is never enough: different people often share a
+first initial and a surname, so it only counts when co-authors back it.
+Two clusters that carry different ORCIDs are never merged.
+
+Usage:
+    python consolidate_authors.py [--store]
+
+Dependencies:
+    pip install pandas
+"""
+
+import sys
+from itertools import combinations
+
+import pandas as pd
+
+from openalex_client import short_id
+from search_index import tokenize
+
+DATA_PATH = "../data/comp_neuro_scholars_raw.csv"
+CLUSTERS_PATH = "../data/author_clusters.csv"
+MIN_SHARED_COAUTHORS = 3
+# Larger (name key, co-author) blocks are too common a name to count as evidence
+MAX_COAUTHOR_BLOCK = 50
+NAME_PREFIXES = {"prof", "dr", "professor", "sir"}
+
+
+class UnionFind:
+    """Union-find over arbitrary IDs with path compression and union by size.
+
+    Each set may carry one label (e.g. an ORCID); sets with different labels
+    are never united.
+    """
+
+    def __init__(self):
+        self.parent = {}
+        self.size = {}
+        self.label = {}
+
+    def add(self, x, label=None):
+        if x not in self.parent:
+            self.parent[x] = x
+            self.size[x] = 1
+            if label:
+                self.label[x] = label
+
+    def find(self, x):
+        root = x
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while self.parent[x] != root:
+            self.parent[x], x = root, self.parent[x]
+        return root
+
+    def union(self, a, b):
+        """Merge the sets of a and b; returns False if their labels conflict."""
+        ra, rb = self.find(a), self.find(b)
+        if ra == rb:
+            return True
+        la, lb = self.label.get(ra), self.label.get(rb)
+        if la and lb and la != lb:
+            return False
+        if self.size[ra] < self.size[rb]:
+            ra, rb = rb, ra
+        self.parent[rb] = ra
+        self.size[ra] += self.size[rb]
+        if lb and not la:
+            self.label[ra] = lb
+        return True
+
+    def groups(self):
+        groups = {}
+        for x in self.parent:
+            groups.setdefault(self.find(x), []).append(x)
+        return groups
+
+
+def _name_tokens(name):
+    return [t for t in tokenize(name) if t not in NAME_PREFIXES] if isinstance(name, str) else []
+
+
+def name_key(name):
+    """'Terrence J. Sejnowski' -> 't sejnowski'."""
+    tokens = _name_tokens(name)
+    if not tokens:
+        return ""
+    return f"{tokens[0][0]} {tokens[-1]}" if len(tokens) > 1 else tokens[0]
+
+
+def full_name_key(name):
+    """'Terrence J. Sejnowski' -> 'terrence sejnowski'; '' when the given name is only an initial."""
+    tokens = _name_tokens(name)
+    if len(tokens) < 2 or len(tokens[0]) < 2:
+        return ""
+    return f"{tokens[0]} {tokens[-1]}"
+
+
+def institution_keys(institution, institution_id=None):
+    """Blocking keys for one institution: its OpenAlex ID and its full normalized name."""
+    keys = []
+    if isinstance(institution_id, str) and institution_id.strip():
+        keys.append(f"id:{short_id(institution_id.strip())}")
+    if isinstance(institution, str):
+        normalized = " ".join(tokenize(institution))
+        if normalized:
+            keys.append(f"name:{normalized}")
+    return keys
+
+
+def normalize_orcid(orcid):
+    if not isinstance(orcid, str) or not orcid.strip():
+        return None
+    return orcid.strip().rstrip("/").split("/")[-1].upper()
+
+
+def coauthor_sets(store, author_ids):
+    """author id -> set of co-author ids, from the works store."""
+    coauthors = {}
+    for author_id in author_ids:
+        others = set()
+        for work in store.get_works(author_id):
+            for authorship in work.get("authorships") or []:
+                other = (authorship.get("author") or {}).get("id")
+                if other:
+                    others.add(short_id(other))
+        others.discard(author_id)
+        coauthors[author_id] = others
+    return coauthors
+
+
+def _union_blocks(uf, blocks):
+    merged = 0
+    for members in blocks:
+        first = members[0]
+        for other in members[1:]:
+            if uf.find(first) != uf.find(other) and uf.union(first, other):
+                merged += 1
+    return merged
+
+
+def cluster_authors(profiles, store=None):
+    """Map every author id in profiles (id, name, orcid, institution[, institution_id]) to its cluster's canonical id."""
+    profiles = profiles.assign(
+        short=profiles["id"].map(short_id),
+        orcid_key=profiles["orcid"].map(normalize_orcid) if "orcid" in profiles else None,
+        name_key=profiles["name"].map(name_key),
+        full_name_key=profiles["name"].map(full_name_key),
+    )
+    uf = UnionFind()
+    for author_id, orcid in zip(profiles["short"], profiles["orcid_key"]):
+        uf.add(author_id, orcid if isinstance(orcid, str) else None)
+
+    # 1. Shared ORCID
+    by_orcid = profiles[profiles["orcid_key"].notna()].groupby("orcid_key")["short"].apply(list)
+    merged = {"orcid": _union_blocks(uf, [m for m in by_orcid if len(m) > 1])}
+
+    # Only names that occur more than once can hide a split profile
+    named = profiles[(profiles["name_key"] != "") & profiles["name_key"].duplicated(keep=False)]
+
+    # 2. Full name + same institution (OpenAlex institution ID or full normalized name)
+    full = profiles[(profiles["full_name_key"] != "") & profiles["full_name_key"].duplicated(keep=False)]
+    institution_ids = full["institution_id"] if "institution_id" in full else pd.Series(None, index=full.index)
+    inst = full.assign(token=[institution_keys(i, n) for i, n in zip(full["institution"], institution_ids)])
+    inst = inst.explode("token")
+    inst = inst[inst["token"].notna()]
+    by_inst = inst.groupby(["full_name_key", "token"])["short"].apply(lambda s: sorted(set(s)))
+    merged["institution"] = _union_blocks(uf, [m for m in by_inst if len(m) > 1])
+
+    # 3. Name key + shared co-authors (block on (name key, co-author), count pairs)
+    merged["coauthors"] = 0
+    if store is not None and len(named):
+        coauthors = coauthor_sets(store, named["short"])
+        pairs = [(k, a, c) for k, a in zip(named["name_key"], named["short"]) for c in coauthors.get(a, ())]
+        blocks = pd.DataFrame(pairs, columns=["name_key", "short", "coauthor"])
+        shared = {}
+        for members in blocks.groupby(["name_key", "coauthor"])["short"].apply(list):
+            if 1 < len(members) <= MAX_COAUTHOR_BLOCK:
+                for pair in combinations(sorted(members), 2):
+                    shared[pair] = shared.get(pair, 0) + 1
+        strong = [list(pair) for pair, count in shared.items() if count >= MIN_SHARED_COAUTHORS]
+        merged["coauthors"] = _union_blocks(uf, strong)
+
+    print(f"Consolidation: {len(profiles)} ids, merges by orcid {merged['orcid']}, "
+          f"institution {merged['institution']}, co-authors {merged['coauthors']}")
+
+    # Canonical id: a real OpenAlex id before placeholders, then the most cited
+    citations = dict(zip(profiles["short"], profiles.get("cited_by_count", pd.Series(0, index=profiles.index))))
+    canonical = {}
+    for members in uf.groups().values():
+        best = min(members, key=lambda m: (m.startswith("GS_"), -(citations.get(m) or 0), m))
+        for m in members:
+            canonical[m] = best
+    return canonical
+
+
+def merged_works(store, author_ids):
+    """Union of the stored works of several author ids, deduplicated by work id."""
+    works = {}
+    for author_id in author_ids:
+        for work in store.get_works(author_id):
+            works[short_id(work["id"])] = work
+    return list(works.values())
+
+
+def h_index(citations):
+    counts = sorted(citations, reverse=True)
+    return sum(1 for i, c in enumerate(counts, 1) if c >= i)
+
+
+def merge_metrics(rows, works=None):
+    """Combine the rows of one cluster (canonical row first) into a single row.
+
+    Split OpenAlex profiles hold disjoint works, so their counts add up;
+    placeholder rows describe the same record from another source, so they
+    only raise a value. With the merged works list, h/i10 are recomputed.
+    """
+    rows = rows.copy()
+    merged = rows.iloc[0].to_dict()
+    real = rows[~rows["id"].map(short_id).str.startswith("GS_")]
+    placeholders = rows.drop(real.index)
+    for column in ("works_count", "cited_by_count"):
+        if column in rows:
+            merged[column] = max(real[column].fillna(0).sum(), placeholders[column].fillna(0).max() if len(placeholders) else 0)
+    for column in ("h_index", "i10_index", "2yr_mean_citedness"):
+        if column in rows:
+            merged[column] = rows[column].fillna(0).max()
+    if works:
+        citations = [w.get("cited_by_count") or 0 for w in works]
+        merged["works_count"] = max(merged.get("works_count") or 0, len(works))
+        merged["h_index"] = max(merged.get("h_index") or 0, h_index(citations))
+        merged["i10_index"] = max(merged.get("i10_index") or 0, sum(1 for c in citations if c >= 10))
+    if "orcid" in rows:
+        orcids = rows["orcid"].dropna()
+        orcids = orcids[orcids.astype(str).str.strip() != ""]
+        merged["orcid"] = orcids.iloc[0] if len(orcids) else merged.get("orcid")
+    for column in ("institution", "country", "top_concepts"):
+        if column in rows and not (isinstance(merged.get(column), str) and merged[column]):
+            values = rows[column].dropna()
+            values = values[values.astype(str) != ""]
+            if len(values):
+                merged[column] = values.iloc[0]
+    merged["merged_ids"] = "|".join(rows["id"].map(short_id))
+    return merged
+
+
+def consolidate(df, store=None, canonical=None):
+    """Collapse split profiles in an author table. Returns (DataFrame, {id: canonical id})."""
+    canonical = canonical or cluster_authors(df, store)
+    keys = df["id"].map(short_id).map(canonical)
+    sizes = keys.map(keys.value_counts())
+    singles = df[sizes == 1].assign(merged_ids=df["id"].map(short_id))
+
+    merged = []
+    for key, rows in df[sizes > 1].groupby(keys[sizes > 1]):
+        # Canonical row first so its profile fields win
+        rows = rows.iloc[rows["id"].map(short_id).ne(key).argsort(kind="stable")]
+        works = merged_works(store, rows["id"].map(short_id)) if store is not None else None
+        merged.append(merge_metrics(rows, works))
+
+    result = pd.concat([singles, pd.DataFrame(merged)], ignore_index=True) if merged else singles
+    print(f"Consolidated {len(df)} rows into {len(result)} scholars")
+    return result, canonical
+
+
+def main():
+    store = None
+    if "--store" in sys.argv:
+        from scholar_store import ScholarStore
+        store = ScholarStore()
+
+    print("=" * 60)
+    print("Split-Profile Consolidation")
+    print("=" * 60)
+
+    df = pd.read_csv(DATA_PATH)
+    consolidated, canonical = consolidate(df, store)
+
+    clusters = pd.DataFrame(sorted(canonical.items()), columns=["id", "canonical_id"])
+    clusters.to_csv(CLUSTERS_PATH, index=False, encoding="utf-8")
+    print(f"\nCluster map saved to {CLUSTERS_PATH}")
+
+    multi = consolidated[consolidated["merged_ids"].str.contains("|", regex=False)]
+    print(f"\n## Merged profiles ({len(multi)})")
+    for _, row in multi.iterrows():
+        print(f"  {row['name']}: {row['merged_ids']} -> {row['cited_by_count']:,} citations")
+
+
+if __name__ == "__main__":
+    main()
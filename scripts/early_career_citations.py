@@ -6,82 +6,84 @@ Analyze first 5 years citations for computational neuroscience scholars
 to evaluate early academic impact.
 """
 
-import requests
 import pandas as pd
-import time
 from datetime import datetime
 
-OPENALEX_BASE = "https://api.openalex.org"
+from openalex_client import get_json, short_id
+from snapshots import SnapshotStore
+from streaming_stats import EARLY_CAREER_METRICS, FieldStatistics, export_percentile_table
+
 EMAIL = "researcher@example.com"
 
 
-def get_author_first_year(author_id, email=None):
-    """Get author's first publication year."""
-    author_short_id = author_id.split("/")[-1]
-    url = f"{OPENALEX_BASE}/works"
+def get_first_work(author_id, email=None):
+    """Get author's earliest work ({} if they have none, None if the request failed)."""
     params = {
-        "filter": f"author.id:{author_short_id}",
+        "filter": f"author.id:{short_id(author_id)}",
         "sort": "publication_year:asc",
         "per_page": 1,
     }
-    if email:
-        params["mailto"] = email
+    data = get_json("/works", params, email, timeout=15)
+    if data is None:
+        return None
+    results = data.get("results", [])
+    return results[0] if results else {}
+
 
-    try:
-        resp = requests.get(url, params=params, timeout=15)
-        if resp.status_code == 200:
-            data = resp.json()
-            results = data.get("results", [])
-            if results:
-                return results[0].get("publication_year")
-    except Exception as e:
-        print(f"  Error fetching first pub year: {e}")
-    return None
+def get_author_first_year(author_id, email=None):
+    """Get author's first publication year."""
+    return (get_first_work(author_id, email) or {}).get("publication_year")
 
 
 def get_early_career_citations(author_id, first_year, years=5, email=None):
-    """Get total citations for papers published in first N years."""
+    """Get total citations for papers published in first N years (None if the request failed)."""
     if not first_year:
         return None, 0, []
 
-    author_short_id = author_id.split("/")[-1]
     end_year = first_year + years - 1
-
-    url = f"{OPENALEX_BASE}/works"
     params = {
-        "filter": f"author.id:{author_short_id},publication_year:{first_year}-{end_year}",
+        "filter": f"author.id:{short_id(author_id)},publication_year:{first_year}-{end_year}",
         "per_page": 200,
     }
-    if email:
-        params["mailto"] = email
+    data = get_json("/works", params, email, timeout=15)
+    if data is None:
+        return None
+    return summarize_early_works(data.get("results", []))
+
 
+def summarize_early_works(works):
+    """Total citations, works count and top 3 papers for a list of early works."""
     total_citations = 0
-    works_count = 0
     top_papers = []
 
-    try:
-        resp = requests.get(url, params=params, timeout=15)
-        if resp.status_code == 200:
-            data = resp.json()
-            results = data.get("results", [])
-            works_count = len(results)
+    for work in works:
+        cited = work.get("cited_by_count", 0)
+        total_citations += cited
+        top_papers.append({
+            "title": work.get("title", ""),
+            "year": work.get("publication_year"),
+            "citations": cited,
+        })
 
-            for work in results:
-                cited = work.get("cited_by_count", 0)
-                total_citations += cited
-                top_papers.append({
-                    "title": work.get("title", ""),
-                    "year": work.get("publication_year"),
-                    "citations": cited,
-                })
+    # Sort by citations, take top 3
+    top_papers = sorted(top_papers, key=lambda x: x["citations"], reverse=True)[:3]
 
-            # Sort by citations, take top 3
-            top_papers = sorted(top_papers, key=lambda x: x["citations"], reverse=True)[:3]
+    return total_citations, len(works), top_papers
 
-    except Exception as e:
-        print(f"  Error fetching early papers: {e}")
 
-    return total_citations, works_count, top_papers
+def first_year_from_works(works):
+    """First publication year from an author's full works list (no API call)."""
+    years = [w.get("publication_year") for w in works if w.get("publication_year")]
+    return min(years) if years else None
+
+
+def early_career_from_works(works, first_year, years=5):
+    """Same result as get_early_career_citations, computed from locally stored works."""
+    if not first_year:
+        return None, 0, []
+    end_year = first_year + years - 1
+    early = [w for w in works if w.get("publication_year") and first_year <= w["publication_year"] <= end_year]
+    return summarize_early_works(early)
 
 
 def main():
@@ -93,7 +95,15 @@ def main():
     df = pd.read_csv("../data/comp_neuro_scholars_raw.csv")
     print(f"\nLoaded {len(df)} scholars")
 
+    # One planned pass: first years and early works not already stored or cached
+    from request_planner import RequestPlanner
+    from scholar_store import ScholarStore
+    planner = RequestPlanner(ScholarStore(), df["id"], ["early_career"], EMAIL,
+                             dict(zip(df["id"], df["works_count"])))
+    print(f"Fetched early-career data with {planner.execute()} requests")
+
     results = []
+    stats = FieldStatistics(EARLY_CAREER_METRICS)
 
     for i, row in df.iterrows():
         name = row["name"]
@@ -105,19 +115,22 @@ def main():
         print(f"\n[{i+1}/{len(df)}] Processing: {name}")
 
         # Get first publication year
-        first_year = get_author_first_year(author_id, EMAIL)
+        first_year = planner.resolve(author_id, "first_year")
 
         if first_year:
             print(f"  First pub year: {first_year}")
 
             # Get first 5 years citations
-            early_citations, early_works, top_papers = get_early_career_citations(
-                author_id, first_year, years=5, email=EMAIL
-            )
+            early = planner.resolve(author_id, "early_works")
+            if early is None:
+                print(f"  Cannot fetch early-career works")
+                continue
+            early_citations, early_works, top_papers = early
 
             print(f"  First 5 years: {early_works} works, {early_citations:,} citations")
 
             results.append({
+                "id": author_id,
                 "name": name,
                 "institution": institution,
                 "first_pub_year": first_year,
@@ -130,11 +143,10 @@ def main():
                 "top_paper_1": top_papers[0]["title"] if len(top_papers) > 0 else "",
                 "top_paper_1_citations": top_papers[0]["citations"] if len(top_papers) > 0 else 0,
             })
+            stats.add_author(results[-1])
         else:
             print(f"  Cannot fetch first pub year")
 
-        time.sleep(0.15)  # API rate limit
-
     # Convert to DataFrame
     results_df = pd.DataFrame(results)
 
@@ -144,6 +156,9 @@ def main():
     # Save results
     results_df.to_csv("../data/early_career_citations.csv", index=False, encoding="utf-8")
     print(f"\n\nResults saved to ../data/early_career_citations.csv")
+    export_percentile_table(stats, "../scholar-viz/src/data/earlyCareerStats.json")
+    # Dated, deduplicated snapshot of all pipeline outputs
+    SnapshotStore().create()
 
     # Print leaderboard
     print("\n" + "=" * 70)
@@ -12,56 +12,60 @@ Dependencies:
     pip install requests pandas matplotlib seaborn
 """
 
-import requests
 import pandas as pd
 import json
 from datetime import datetime
 from collections import defaultdict
-import time
+
+from aggregate_cube import build_cube
+from early_career_citations import get_author_first_year
+from openalex_client import get_authors_batched, get_json
+from snapshots import SnapshotStore
+from streaming_stats import FieldStatistics, export_percentile_table
+from topic_classifier import TopicClassifier, weighted_from_columns
 
 # OpenAlex API configuration
-OPENALEX_BASE = "https://api.openalex.org"
 # Computational Neuroscience concept ID
 CONCEPT_ID = "C15286952"
 # Your email (polite request, optional but recommended)
 EMAIL = "your-email@example.com"
 
 
-def get_authors_by_concept(concept_id, limit=100, email=None):
-    """Get top authors in a field by concept ID."""
+def get_authors_by_concept(concept_id, limit=100, email=None, stats=None, store=None):
+    """Get top authors in a field by concept ID.
+
+    If a FieldStatistics is given, each author is accumulated as it streams in.
+    If a ScholarStore is given, the raw author records are kept in it.
+    """
     authors = []
     per_page = 50
 
     for page in range(1, (limit // per_page) + 2):
-        url = f"{OPENALEX_BASE}/authors"
         params = {
             "filter": f"x_concepts.id:{concept_id}",
             "sort": "cited_by_count:desc",
             "per_page": per_page,
             "page": page,
         }
-        if email:
-            params["mailto"] = email
-
-        try:
-            resp = requests.get(url, params=params, timeout=30)
-            resp.raise_for_status()
-            data = resp.json()
-
-            if not data.get("results"):
-                break
-
-            for author in data["results"]:
-                authors.append(parse_author(author))
-                if len(authors) >= limit:
-                    return authors
+        # Shared client: throttled across threads, archived and coalesced
+        data = get_json("/authors", params, email)
+        if data is None:
+            print(f"Error fetching page {page}")
+            break
+        if not data.get("results"):
+            break
 
-            print(f"Fetched {len(authors)} authors...")
-            time.sleep(0.1)  # Rate limit delay
+        for author in data["results"]:
+            parsed = parse_author(author)
+            authors.append(parsed)
+            if store is not None:
+                store.put_author(author)
+            if stats is not None:
+                stats.add_author(parsed)
+            if len(authors) >= limit:
+                return authors
 
-        except Exception as e:
-            print(f"Error fetching page {page}: {e}")
-            break
+        print(f"Fetched {len(authors)} authors...")
 
     return authors
 
@@ -78,19 +82,16 @@ def get_authors_by_works(concept_id, limit=100, email=None):
     })
 
     # Get highly-cited papers in this field
-    url = f"{OPENALEX_BASE}/works"
     params = {
         "filter": f"concepts.id:{concept_id}",
         "sort": "cited_by_count:desc",
         "per_page": 200,
     }
-    if email:
-        params["mailto"] = email
 
     try:
-        resp = requests.get(url, params=params, timeout=30)
-        resp.raise_for_status()
-        data = resp.json()
+        data = get_json("/works", params, email)
+        if data is None:
+            raise RuntimeError("works query failed")
 
         for work in data.get("results", []):
             for authorship in work.get("authorships", []):
@@ -114,23 +115,11 @@ def get_authors_by_works(concept_id, limit=100, email=None):
         # Get detailed info for each author
         print(f"Found {len(author_citations)} authors from papers, fetching details...")
 
-        authors = []
-        for i, (author_id, info) in enumerate(author_citations.items()):
-            if i >= limit:
-                break
-
-            author_url = author_id.replace("https://openalex.org/", f"{OPENALEX_BASE}/")
-            try:
-                resp = requests.get(author_url, params={"mailto": email} if email else {}, timeout=10)
-                if resp.status_code == 200:
-                    author_data = resp.json()
-                    authors.append(parse_author(author_data))
-            except:
-                pass
-
-            if i % 10 == 0:
-                print(f"Progress: {i}/{min(len(author_citations), limit)}")
-            time.sleep(0.05)
+        # One batched request per 50 authors instead of one request per author
+        author_ids = list(author_citations)[:limit]
+        fetched = {author_data["id"]: author_data for author_data in get_authors_batched(author_ids, email=email)}
+        authors = [parse_author(fetched[author_id]) for author_id in author_ids if author_id in fetched]
+        print(f"Progress: {len(authors)}/{len(author_ids)}")
 
         return authors
 
@@ -144,14 +133,17 @@ def parse_author(author_data):
     # Get last known institution
     last_inst = author_data.get("last_known_institutions", [])
     institution = ""
+    institution_id = ""
     country = ""
     if last_inst:
         institution = last_inst[0].get("display_name", "")
+        institution_id = last_inst[0].get("id", "")
         country = last_inst[0].get("country_code", "")
 
     # Get research areas (concepts)
     concepts = author_data.get("x_concepts", [])
     top_concepts = [c.get("display_name", "") for c in concepts[:5]]
+    top_concept_scores = [str(c.get("score", 0)) for c in concepts[:5]]
 
     # Get summary_stats
     stats = author_data.get("summary_stats", {})
@@ -166,32 +158,28 @@ def parse_author(author_data):
         "i10_index": stats.get("i10_index", 0),
         "2yr_mean_citedness": stats.get("2yr_mean_citedness", 0),
         "institution": institution,
+        "institution_id": institution_id,
         "country": country,
         "top_concepts": ", ".join(top_concepts),
+        "top_concept_scores": ", ".join(top_concept_scores),
         "works_api_url": author_data.get("works_api_url", ""),
     }
 
 
 def get_first_publication_year(author_id, email=None):
-    """Get author's first publication year (for estimating academic age)."""
-    works_url = author_id.replace("https://openalex.org/", f"{OPENALEX_BASE}/")
-    works_url = works_url.replace("/authors/", "/works?filter=author.id:")
-    works_url += "&sort=publication_year:asc&per_page=1"
+    """Get author's first publication year (for estimating academic age).
 
-    try:
-        resp = requests.get(works_url, params={"mailto": email} if email else {}, timeout=10)
-        if resp.status_code == 200:
-            data = resp.json()
-            results = data.get("results", [])
-            if results:
-                return results[0].get("publication_year")
-    except:
-        pass
-    return None
-
-
-def analyze_authors(authors_df):
-    """Analyze author data."""
+    Same request as early_career_citations.get_author_first_year, so both
+    stages share one coalesced / archived query.
+    """
+    return get_author_first_year(author_id, email)
+
+
+def analyze_authors(authors_df, cube=None):
+    """Analyze author data.
+
+    When an AggregateCube is given, distributions are read from its rollups.
+    """
     print("\n" + "="*60)
     print("Computational Neuroscience TOP Scholar Analysis Report")
     print("="*60)
@@ -215,15 +203,21 @@ def analyze_authors(authors_df):
 
     # Institution distribution
     print("\n## 4. Institution Distribution (TOP 10)")
-    inst_counts = authors_df['institution'].value_counts().head(10)
-    for inst, count in inst_counts.items():
+    if cube is not None:
+        inst_counts = cube.top("institution", 10)
+    else:
+        inst_counts = authors_df['institution'].value_counts().head(10).items()
+    for inst, count in inst_counts:
         if inst:
             print(f"  {inst}: {count} scholars")
 
     # Country distribution
     print("\n## 5. Country/Region Distribution")
-    country_counts = authors_df['country'].value_counts().head(10)
-    for country, count in country_counts.items():
+    if cube is not None:
+        country_counts = cube.top("country", 10)
+    else:
+        country_counts = authors_df['country'].value_counts().head(10).items()
+    for country, count in country_counts:
         if country:
             print(f"  {country}: {count} scholars")
 
@@ -238,51 +232,41 @@ def analyze_authors(authors_df):
     return authors_df
 
 
-def calculate_academic_age(authors_df, email=None):
-    """Calculate academic age (based on first publication year)."""
+def calculate_academic_age(authors_df, email=None, store=None):
+    """Calculate academic age (based on first publication year).
+
+    First years come through the request planner: scholars whose works are
+    already stored, or whose first year another stage already queried, cost
+    no request.
+    """
+    from request_planner import RequestPlanner
+    from scholar_store import ScholarStore
+
     print("\nFetching academic age info (first publication year)...")
     current_year = datetime.now().year
 
-    first_years = []
-    for i, row in authors_df.iterrows():
-        year = get_first_publication_year(row['id'], email)
-        first_years.append(year)
-        if i % 10 == 0:
-            print(f"  Progress: {i+1}/{len(authors_df)}")
-        time.sleep(0.05)
+    planner = RequestPlanner(store or ScholarStore(), authors_df['id'], ["scholars"], email,
+                             dict(zip(authors_df['id'], authors_df['works_count'])))
+    print(f"  {planner.execute()} requests sent")
 
-    authors_df['first_pub_year'] = first_years
+    authors_df['first_pub_year'] = [planner.resolve(author_id, "first_year") for author_id in authors_df['id']]
     authors_df['academic_age'] = current_year - authors_df['first_pub_year']
     authors_df['m_index'] = authors_df['h_index'] / authors_df['academic_age'].replace(0, 1)
 
     return authors_df
 
 
-def categorize_scholars(authors_df):
-    """Categorize scholars by research area."""
-    categories = []
-
-    for _, row in authors_df.iterrows():
-        concepts = row.get('top_concepts', '').lower()
-
-        # Categorize based on research area
-        if any(k in concepts for k in ['machine learning', 'deep learning', 'artificial intelligence']):
-            cat = "ML/AI + Neuro"
-        elif any(k in concepts for k in ['neuroscience', 'brain', 'neural']):
-            if 'cognitive' in concepts or 'psychology' in concepts:
-                cat = "Cognitive Neuroscience"
-            elif 'computation' in concepts or 'model' in concepts:
-                cat = "Computational Modeling"
-            else:
-                cat = "Systems Neuroscience"
-        elif 'mathematics' in concepts or 'statistics' in concepts:
-            cat = "Mathematical/Statistical Methods"
-        else:
-            cat = "Other"
+def categorize_scholars(authors_df, classifier=None, concepts=None):
+    """Categorize scholars by research area using the taxonomy classifier.
 
-        categories.append(cat)
-
-    authors_df['category'] = categories
+    concepts is an optional Series of [(concept name, weight)] lists aligned
+    with authors_df (e.g. from raw x_concepts scores); otherwise the weights
+    come from the top_concepts / top_concept_scores columns.
+    """
+    classifier = classifier or TopicClassifier.from_file()
+    if concepts is None:
+        concepts = weighted_from_columns(authors_df)
+    authors_df['category'] = classifier.classify(concepts)
     return authors_df
 
 
@@ -293,12 +277,16 @@ def main():
 
     # Method 1: Fetch via concepts directly
     print("\nTrying Method 1: via x_concepts...")
-    authors = get_authors_by_concept(CONCEPT_ID, limit=100, email=EMAIL)
+    stats = FieldStatistics()
+    authors = get_authors_by_concept(CONCEPT_ID, limit=100, email=EMAIL, stats=stats)
 
     # If Method 1 fails, try Method 2
     if len(authors) < 50:
         print("\nMethod 1 insufficient, trying Method 2: via highly-cited papers...")
         authors = get_authors_by_works(CONCEPT_ID, limit=100, email=EMAIL)
+        stats = FieldStatistics()
+        for author in authors:
+            stats.add_author(author)
 
     if not authors:
         print("Cannot fetch data. Please check network connection or try other data sources.")
@@ -311,12 +299,18 @@ def main():
     df.to_csv("../data/comp_neuro_scholars_raw.csv", index=False, encoding='utf-8')
     print(f"\nRaw data saved to ../data/comp_neuro_scholars_raw.csv ({len(df)} records)")
 
-    # Analyze
-    df = analyze_authors(df)
+    # Field-wide percentile tables (streamed, constant memory)
+    export_percentile_table(stats)
 
     # Categorize
     df = categorize_scholars(df)
 
+    # Rollups for the analysis below; the site rollups come from materialize_rankings
+    cube = build_cube(df, state_path=None, concept_id=CONCEPT_ID)
+
+    # Analyze
+    df = analyze_authors(df, cube)
+
     # Optional: get academic age (slower)
     # df = calculate_academic_age(df, EMAIL)
 
@@ -329,6 +323,9 @@ def main():
     for cat, count in df['category'].value_counts().items():
         print(f"  {cat}: {count} scholars")
 
+    # Dated, deduplicated snapshot of all pipeline outputs
+    SnapshotStore().create()
+
 
 if __name__ == "__main__":
     main()
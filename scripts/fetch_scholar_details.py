@@ -3,100 +3,88 @@
 Fetch detailed information for each scholar to generate profile pages.
 """
 
-import requests
 import pandas as pd
 import json
-import time
 from datetime import datetime
 
+from fetch_comp_neuro_scholars import CONCEPT_ID
+from openalex_client import get_author, get_json, short_id
+from snapshots import SnapshotStore
+
 OPENALEX_BASE = "https://api.openalex.org"
 EMAIL = "researcher@example.com"
 
 
 def get_author_details(author_id, email=None):
     """Get complete author details."""
-    author_short_id = author_id.split("/")[-1]
-    url = f"{OPENALEX_BASE}/authors/{author_short_id}"
-
-    params = {}
-    if email:
-        params["mailto"] = email
-
-    try:
-        resp = requests.get(url, params=params, timeout=15)
-        if resp.status_code == 200:
-            return resp.json()
-    except Exception as e:
-        print(f"  Error fetching author details: {e}")
-    return None
+    return get_author(author_id, email)
 
 
 def get_author_works(author_id, email=None, limit=50):
-    """Get author's top publications."""
-    author_short_id = author_id.split("/")[-1]
-    url = f"{OPENALEX_BASE}/works"
+    """Get author's top publications (None if the request failed)."""
     params = {
-        "filter": f"author.id:{author_short_id}",
+        "filter": f"author.id:{short_id(author_id)}",
         "sort": "cited_by_count:desc",
         "per_page": limit,
     }
-    if email:
-        params["mailto"] = email
-
-    works = []
-    try:
-        resp = requests.get(url, params=params, timeout=15)
-        if resp.status_code == 200:
-            data = resp.json()
-            for work in data.get("results", []):
-                works.append({
-                    "title": work.get("title", ""),
-                    "year": work.get("publication_year"),
-                    "citations": work.get("cited_by_count", 0),
-                    "type": work.get("type", ""),
-                    "doi": work.get("doi", ""),
-                    "venue": work.get("primary_location", {}).get("source", {}).get("display_name", "") if work.get("primary_location") else "",
-                })
-    except Exception as e:
-        print(f"  Error fetching works: {e}")
-    return works
+    data = get_json("/works", params, email, timeout=15)
+    if data is None:
+        return None
+    return [parse_work(work) for work in data.get("results", [])]
+
+
+def parse_work(work):
+    """Parse a raw OpenAlex work into a topWorks entry."""
+    location = work.get("primary_location") or {}
+    source = location.get("source") or {}
+    return {
+        "title": work.get("title", ""),
+        "year": work.get("publication_year"),
+        "citations": work.get("cited_by_count", 0),
+        "type": work.get("type", ""),
+        "doi": work.get("doi", ""),
+        "venue": source.get("display_name", ""),
+    }
 
 
 def get_yearly_citations(author_id, email=None):
-    """Get author's yearly publication and citation data."""
-    author_short_id = author_id.split("/")[-1]
-    url = f"{OPENALEX_BASE}/works"
+    """Get author's yearly publication and citation data (None if the request failed)."""
     params = {
-        "filter": f"author.id:{author_short_id}",
+        "filter": f"author.id:{short_id(author_id)}",
         "group_by": "publication_year",
     }
-    if email:
-        params["mailto"] = email
+    data = get_json("/works", params, email, timeout=15)
+    if data is None:
+        return None
 
     yearly_data = []
-    try:
-        resp = requests.get(url, params=params, timeout=15)
-        if resp.status_code == 200:
-            data = resp.json()
-            for item in data.get("group_by", []):
-                year = item.get("key")
-                if year and str(year).isdigit():
-                    yearly_data.append({
-                        "year": int(year),
-                        "works": item.get("count", 0),
-                    })
-            yearly_data.sort(key=lambda x: x["year"])
-    except Exception as e:
-        print(f"  Error fetching yearly data: {e}")
+    for item in data.get("group_by", []):
+        year = item.get("key")
+        if year and str(year).isdigit():
+            yearly_data.append({
+                "year": int(year),
+                "works": item.get("count", 0),
+            })
+    yearly_data.sort(key=lambda x: x["year"])
     return yearly_data
 
 
-def get_coauthors(author_id, email=None, limit=10):
+def yearly_from_works(works):
+    """Yearly publication counts from a raw works list (same shape as get_yearly_citations)."""
+    counts = {}
+    for work in works:
+        year = work.get("publication_year")
+        if year:
+            counts[int(year)] = counts.get(int(year), 0) + 1
+    return [{"year": year, "works": count} for year, count in sorted(counts.items())]
+
+
+def get_coauthors(author_id, email=None, limit=10, concept_id=CONCEPT_ID):
     """Get main collaborators."""
     author_short_id = author_id.split("/")[-1]
     url = f"{OPENALEX_BASE}/authors"
     params = {
-        "filter": f"x_concepts.id:C15286952",  # Computational Neuroscience
+        "filter": f"x_concepts.id:{concept_id}",
         "per_page": 200,
     }
     if email:
@@ -191,6 +179,60 @@ def categorize_impact(cited_by, h_index, works_count):
     return categories
 
 
+def build_scholar_detail(author_id, name, details, works, yearly, early_data, institution="", country=""):
+    """Assemble one scholarDetails.json record from fetched or stored data."""
+    # Analyze topics
+    topics = analyze_research_topics(details.get("x_concepts", []))
+
+    # Generate summary
+    summary = generate_scholar_summary(name, details, works, early_data)
+
+    # Impact categories
+    impact_categories = categorize_impact(
+        details.get("cited_by_count", 0),
+        details.get("summary_stats", {}).get("h_index", 0),
+        details.get("works_count", 0)
+    )
+
+    return {
+        "id": author_id.split("/")[-1],
+        "name": name,
+        "orcid": details.get("orcid", ""),
+        "worksCount": details.get("works_count", 0),
+        "citedByCount": details.get("cited_by_count", 0),
+        "hIndex": details.get("summary_stats", {}).get("h_index", 0),
+        "i10Index": details.get("summary_stats", {}).get("i10_index", 0),
+        "twoYearMeanCitedness": round(details.get("summary_stats", {}).get("2yr_mean_citedness", 0), 2),
+        "institution": institution,
+        "country": country,
+        "topics": topics,
+        "topWorks": works[:15],
+        "yearlyData": yearly,
+        "summary": summary,
+        "impactCategories": impact_categories,
+        "earlyCareer": {
+            "firstPubYear": int(early_data.get("first_pub_year", 0)) if pd.notna(early_data.get("first_pub_year")) else None,
+            "earlyCareerEnd": int(early_data.get("early_career_end", 0)) if pd.notna(early_data.get("early_career_end")) else None,
+            "earlyWorksCount": int(early_data.get("early_works_count", 0)) if pd.notna(early_data.get("early_works_count")) else 0,
+            "earlyCareerCitations": int(early_data.get("early_career_citations", 0)) if pd.notna(early_data.get("early_career_citations")) else 0,
+            "earlyPct": float(early_data.get("early_pct", 0)) if pd.notna(early_data.get("early_pct")) else 0,
+            "topPaper": early_data.get("top_paper_1", "") if pd.notna(early_data.get("top_paper_1")) else "",
+        } if early_data else None,
+        "openAlexUrl": author_id,
+    }
+
+
+def clean_nan(obj):
+    """Convert NaN to None for valid JSON."""
+    if isinstance(obj, float) and (obj != obj):  # NaN check
+        return None
+    elif isinstance(obj, dict):
+        return {k: clean_nan(v) for k, v in obj.items()}
+    elif isinstance(obj, list):
+        return [clean_nan(v) for v in obj]
+    return obj
+
+
 def main():
     print("=" * 70)
     print("Fetching Scholar Details")
@@ -201,7 +243,19 @@ def main():
 
     # Load early career data
     early_career_df = pd.read_csv("../data/early_career_citations.csv")
-    early_career_dict = {row["name"]: row.to_dict() for _, row in early_career_df.iterrows()}
+    early_career_records = early_career_df.to_dict("records")
+    early_by_id = "id" in early_career_df.columns
+    if early_by_id:
+        early_career_lookup = {short_id(r["id"]): r for r in early_career_records if isinstance(r.get("id"), str)}
+    else:
+        # Older CSVs have no id column; names can collide, so they are only used then
+        early_career_lookup = {r["name"]: r for r in early_career_records}
+
+    # One planned pass: profiles in batches, works queries only where not stored or cached
+    from request_planner import RequestPlanner
+    from scholar_store import ScholarStore
+    planner = RequestPlanner(ScholarStore(), df["id"], ["details"], EMAIL, dict(zip(df["id"], df["works_count"])))
+    print(f"Fetched profile data with {planner.execute()} requests")
 
     scholars_details = []
 
@@ -212,84 +266,28 @@ def main():
         print(f"\n[{i+1}/{len(df)}] Processing: {name}")
 
         # Get details
-        details = get_author_details(author_id, EMAIL)
+        details = planner.resolve(author_id, "author")
         if not details:
             print(f"  Skipped: cannot fetch details")
             continue
 
-        time.sleep(0.1)
-
         # Get works
-        works = get_author_works(author_id, EMAIL, limit=30)
+        works = planner.resolve(author_id, "top_works") or []
         print(f"  Fetched {len(works)} works")
 
-        time.sleep(0.1)
-
         # Get yearly data
-        yearly = get_yearly_citations(author_id, EMAIL)
+        yearly = planner.resolve(author_id, "yearly_counts") or []
         print(f"  Fetched {len(yearly)} years of data")
 
-        time.sleep(0.1)
-
-        # Analyze topics
-        topics = analyze_research_topics(details.get("x_concepts", []))
-
         # Get early career data
-        early_data = early_career_dict.get(name, {})
-
-        # Generate summary
-        summary = generate_scholar_summary(name, details, works, early_data)
-
-        # Impact categories
-        impact_categories = categorize_impact(
-            details.get("cited_by_count", 0),
-            details.get("summary_stats", {}).get("h_index", 0),
-            details.get("works_count", 0)
-        )
-
-        # Build complete record
-        scholar_detail = {
-            "id": author_id.split("/")[-1],
-            "name": name,
-            "orcid": details.get("orcid", ""),
-            "worksCount": details.get("works_count", 0),
-            "citedByCount": details.get("cited_by_count", 0),
-            "hIndex": details.get("summary_stats", {}).get("h_index", 0),
-            "i10Index": details.get("summary_stats", {}).get("i10_index", 0),
-            "twoYearMeanCitedness": round(details.get("summary_stats", {}).get("2yr_mean_citedness", 0), 2),
-            "institution": row.get("institution", ""),
-            "country": row.get("country", ""),
-            "topics": topics,
-            "topWorks": works[:15],
-            "yearlyData": yearly,
-            "summary": summary,
-            "impactCategories": impact_categories,
-            "earlyCareer": {
-                "firstPubYear": int(early_data.get("first_pub_year", 0)) if pd.notna(early_data.get("first_pub_year")) else None,
-                "earlyCareerEnd": int(early_data.get("early_career_end", 0)) if pd.notna(early_data.get("early_career_end")) else None,
-                "earlyWorksCount": int(early_data.get("early_works_count", 0)) if pd.notna(early_data.get("early_works_count")) else 0,
-                "earlyCareerCitations": int(early_data.get("early_career_citations", 0)) if pd.notna(early_data.get("early_career_citations")) else 0,
-                "earlyPct": float(early_data.get("early_pct", 0)) if pd.notna(early_data.get("early_pct")) else 0,
-                "topPaper": early_data.get("top_paper_1", "") if pd.notna(early_data.get("top_paper_1")) else "",
-            } if early_data else None,
-            "openAlexUrl": author_id,
-        }
+        early_data = early_career_lookup.get(short_id(author_id) if early_by_id else name, {})
 
+        scholar_detail = build_scholar_detail(author_id, name, details, works, yearly, early_data,
+                                              row.get("institution", ""), row.get("country", ""))
         scholars_details.append(scholar_detail)
 
     # Save results (handle NaN values)
     output_path = "../scholar-viz/src/data/scholarDetails.json"
-
-    # Convert NaN to None for valid JSON
-    def clean_nan(obj):
-        if isinstance(obj, float) and (obj != obj):  # NaN check
-            return None
-        elif isinstance(obj, dict):
-            return {k: clean_nan(v) for k, v in obj.items()}
-        elif isinstance(obj, list):
-            return [clean_nan(v) for v in obj]
-        return obj
-
     scholars_details = clean_nan(scholars_details)
 
     with open(output_path, "w", encoding="utf-8") as f:
@@ -297,6 +295,9 @@ def main():
 
     print(f"\n\nSaved {len(scholars_details)} scholar details to {output_path}")
 
+    # Dated, deduplicated snapshot of all pipeline outputs
+    SnapshotStore().create()
+
 
 if __name__ == "__main__":
     main()
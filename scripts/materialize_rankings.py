@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+Ranking Materializer
+
+Compute every site leaderboard from the pipeline output in one pass and
+write the site data files, so rankings are deterministic and the frontend
+does not need to sort anything:
+
+    scholars.json          all scholars, ordered by citations
+    earlyCareer.json       top early-career citation scholars
+    youngestScholars.json  most recent career starts
+    rankMatrix.json        per-metric ranks / top-percent, derived metrics,
+                           per-metric and composite orders for RankingMatrix
+    aggregates.json        country / institution / category / concept / year
+                           rollups of the same scholars (aggregate_cube)
+
+Hand corrections that the pipeline cannot reproduce (a misattributed top
+paper, a shortened title, a missing institution) live in
+../data/scholar_overrides.csv as (id, name, field, value) rows and are
+applied to the pipeline columns before anything is ranked, so regenerating
+the site files keeps them.
+
+Usage:
+    python materialize_rankings.py
+
+Dependencies:
+    pip install pandas
+"""
+
+import heapq
+import json
+import os
+from datetime import datetime
+
+import pandas as pd
+
+from aggregate_cube import build_cube, export_rollups
+from consolidate_authors import consolidate
+from fetch_comp_neuro_scholars import CONCEPT_ID, categorize_scholars
+
+RAW_PATH = "../data/comp_neuro_scholars_raw.csv"
+EARLY_CAREER_PATH = "../data/early_career_citations.csv"
+# Curated site categories (id, category); authors without one are categorized automatically
+CATEGORIES_PATH = "../data/scholar_categories.csv"
+# Curated corrections (id, name, field, value) of pipeline columns, e.g. a misattributed top paper
+OVERRIDES_PATH = "../data/scholar_overrides.csv"
+SITE_DATA_DIR = "../scholar-viz/src/data"
+
+# Short leaderboards kept diff-friendly: one record per line
+ONE_RECORD_PER_LINE = {"earlyCareer.json", "youngestScholars.json"}
+
+EARLY_CAREER_TOP = 20
+YOUNGEST_TOP = 10
+MATRIX_METRICS = ["h_index", "mean_citedness_2yr", "efficiency", "m_index", "cited_by_count", "works_count", "i10_index"]
+# Mirrors WEIGHTING_SCHEMES in scholar-viz/src/components/RankingMatrix.tsx
+WEIGHTING_SCHEMES = {
+    "stature": {"h_index": 0.35, "mean_citedness_2yr": 0.30, "efficiency": 0.15, "m_index": 0.10, "cited_by_count": 0.10},
+    "advisor": {"mean_citedness_2yr": 0.45, "h_index": 0.20, "efficiency": 0.15, "m_index": 0.15, "cited_by_count": 0.05},
+    "legacy": {"cited_by_count": 0.40, "h_index": 0.35, "efficiency": 0.15, "m_index": 0.05, "mean_citedness_2yr": 0.05},
+}
+
+
+def _int(value, default=0):
+    return int(value) if pd.notna(value) else default
+
+
+def apply_overrides(df, overrides_path=OVERRIDES_PATH):
+    """Apply curated per-scholar field corrections (the value is stored as text)."""
+    if not os.path.exists(overrides_path):
+        return df
+    overrides = pd.read_csv(overrides_path, dtype=str, keep_default_na=False)
+    for _, row in overrides.iterrows():
+        matches = df["id"] == row["id"]
+        if row["field"] not in df.columns or not matches.any():
+            print(f"  Override skipped: {row['name']} {row['field']} (no such scholar or column)")
+            continue
+        df.loc[matches, row["field"]] = row["value"]
+    return df
+
+
+def load_scholars(raw_path=RAW_PATH, early_path=EARLY_CAREER_PATH, categories_path=CATEGORIES_PATH,
+                  overrides_path=OVERRIDES_PATH):
+    """Consolidated raw scholars joined with early-career data, site categories and curated overrides."""
+    df = pd.read_csv(raw_path)
+    df["top_concepts"] = df["top_concepts"].fillna("")
+    # One row per person: merge split OpenAlex profiles and matching GS_ placeholders
+    df, _ = consolidate(df)
+
+    categories = {}
+    if os.path.exists(categories_path):
+        categories = dict(pd.read_csv(categories_path).values)
+    auto = categorize_scholars(df.copy())["category"]
+    df["category"] = [categories.get(i, c) for i, c in zip(df["id"], auto)]
+
+    early = pd.read_csv(early_path) if os.path.exists(early_path) else pd.DataFrame()
+    if len(early):
+        early = early.rename(columns={"institution": "early_institution", "total_citations": "early_total_citations",
+                                      "h_index": "early_h_index"})
+        early_cols = ["first_pub_year", "early_career_end", "early_works_count", "early_career_citations",
+                      "early_pct", "top_paper_1", "top_paper_1_citations",
+                      "early_institution", "early_total_citations", "early_h_index"]
+        key = "id" if "id" in early.columns else "name"
+        df = df.merge(early[[key] + early_cols].drop_duplicates(key), on=key, how="left")
+    return apply_overrides(df, overrides_path)
+
+
+def rank_order(records, metric, valid=None):
+    """Record indices sorted by metric (desc); ties keep input order."""
+    indices = [i for i, r in enumerate(records) if valid is None or valid(r)]
+    return sorted(indices, key=lambda i: -records[i][metric])
+
+
+def build_rank_matrix(records):
+    """Per-metric ranks, top-percent and composite orders for every weighting scheme."""
+    n = len(records)
+    ranks = {m: [0] * n for m in MATRIX_METRICS}
+    orders = {}
+    for metric in MATRIX_METRICS:
+        valid = (lambda r: r["m_index"] > 0) if metric == "m_index" else None
+        order = rank_order(records, metric, valid)
+        orders[metric] = order
+        for rank, i in enumerate(order, 1):
+            ranks[metric][i] = rank
+
+    m_index_total = len(orders["m_index"])
+    max_rank = {m: (m_index_total if m == "m_index" else n) for m in MATRIX_METRICS}
+
+    composite = {}
+    for scheme, weights in WEIGHTING_SCHEMES.items():
+        scores = []
+        for i in range(n):
+            score = total_weight = 0.0
+            for metric, weight in weights.items():
+                rank = ranks[metric][i]
+                if weight > 0 and rank > 0:
+                    score += (1 - (rank - 1) / max_rank[metric]) * weight
+                    total_weight += weight
+            scores.append(score / total_weight if total_weight else 0)
+        order = sorted(range(n), key=lambda i: -scores[i])
+        orders[f"composite:{scheme}"] = order
+        composite[scheme] = order
+
+    # Scholars without m_index go to the end of the m_index order
+    orders["m_index"] = orders["m_index"] + [i for i in range(n) if ranks["m_index"][i] == 0]
+
+    ids = [r["id"] for r in records]
+    composite_ranks = {scheme: [0] * n for scheme in composite}
+    for scheme, order in composite.items():
+        for rank, i in enumerate(order, 1):
+            composite_ranks[scheme][i] = rank
+
+    scholars = {}
+    for i, r in enumerate(records):
+        scholars[r["id"]] = {
+            "efficiency": r["efficiency"],
+            "m_index": r["m_index"],
+            "academicAge": r["academicAge"],
+            "ranks": {m: ranks[m][i] for m in MATRIX_METRICS},
+            "topPct": {m: round(ranks[m][i] / max_rank[m] * 100, 1) if ranks[m][i] else None for m in MATRIX_METRICS},
+            "composite": {s: composite_ranks[s][i] for s in composite},
+        }
+
+    return {
+        "total": n,
+        "mIndexTotal": m_index_total,
+        "scholars": scholars,
+        "orders": {k: [ids[i] for i in v] for k, v in orders.items()},
+    }
+
+
+def materialize(df, current_year=None):
+    """Return {filename: data} for all site ranking files."""
+    current_year = current_year or datetime.now().year
+    df = df.sort_values("cited_by_count", ascending=False, kind="stable").reset_index(drop=True)
+
+    scholars = []
+    matrix_records = []
+    for _, row in df.iterrows():
+        scholar = {
+            "id": row["id"],
+            "name": row["name"],
+            "works_count": _int(row["works_count"]),
+            "cited_by_count": _int(row["cited_by_count"]),
+            "h_index": _int(row["h_index"]),
+            "i10_index": _int(row["i10_index"]),
+            "institution": row["institution"] if pd.notna(row["institution"]) else "",
+            "country": row["country"] if pd.notna(row["country"]) else "",
+            "category": row["category"],
+            "mean_citedness_2yr": float(row["2yr_mean_citedness"]) if pd.notna(row["2yr_mean_citedness"]) else 0,
+        }
+        scholars.append(scholar)
+
+        first_year = row.get("first_pub_year")
+        academic_age = current_year - int(first_year) if pd.notna(first_year) else None
+        matrix_records.append(dict(
+            scholar,
+            efficiency=scholar["cited_by_count"] / scholar["works_count"] if scholar["works_count"] > 0 else 0,
+            m_index=scholar["h_index"] / academic_age if academic_age and academic_age > 0 and scholar["h_index"] > 0 else 0,
+            academicAge=academic_age,
+        ))
+
+    early = df[df["first_pub_year"].notna()] if "first_pub_year" in df.columns else df.iloc[0:0]
+    early_rows = [r for _, r in early.iterrows()]
+
+    # Early-career boards use the early-career stage's own snapshot of institution / totals
+    top_early = heapq.nlargest(EARLY_CAREER_TOP, early_rows, key=lambda r: r["early_career_citations"])
+    early_career = [{
+        "name": r["name"],
+        "institution": r["early_institution"] if pd.notna(r["early_institution"]) else "",
+        "firstPubYear": _int(r["first_pub_year"]),
+        "earlyCareerEnd": _int(r["early_career_end"]),
+        "earlyWorksCount": _int(r["early_works_count"]),
+        "earlyCareerCitations": _int(r["early_career_citations"]),
+        "totalCitations": _int(r["early_total_citations"]),
+        "hIndex": _int(r["early_h_index"]),
+        "earlyPct": float(r["early_pct"]) if pd.notna(r["early_pct"]) else 0,
+        "topPaper": r["top_paper_1"] if pd.notna(r["top_paper_1"]) else "",
+        "topPaperCitations": _int(r["top_paper_1_citations"]),
+    } for r in top_early]
+
+    youngest_rows = heapq.nlargest(YOUNGEST_TOP, early_rows, key=lambda r: (r["first_pub_year"], r["early_total_citations"]))
+    youngest = [{
+        "name": r["name"],
+        "institution": r["early_institution"] if pd.notna(r["early_institution"]) else "",
+        "firstPubYear": _int(r["first_pub_year"]),
+        "academicAge": current_year - _int(r["first_pub_year"]),
+        "totalCitations": _int(r["early_total_citations"]),
+        "hIndex": _int(r["early_h_index"]),
+        "earlyCareerCitations": _int(r["early_career_citations"]),
+        "topPaper": r["top_paper_1"] if pd.notna(r["top_paper_1"]) else "",
+    } for r in youngest_rows]
+
+    return {
+        "scholars.json": scholars,
+        "earlyCareer.json": early_career,
+        "youngestScholars.json": youngest,
+        "rankMatrix.json": build_rank_matrix(matrix_records),
+    }
+
+
+def write_site_files(files, output_dir=SITE_DATA_DIR):
+    for name, data in files.items():
+        path = os.path.join(output_dir, name)
+        with open(path, "w", encoding="utf-8") as f:
+            if name == "rankMatrix.json":
+                json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+            elif name in ONE_RECORD_PER_LINE:
+                f.write("[\n" + ",\n".join("  " + json.dumps(r, ensure_ascii=False) for r in data) + "\n]\n")
+            else:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+        print(f"  {path} ({len(data) if isinstance(data, list) else data['total']} records)")
+
+
+def main():
+    print("=" * 60)
+    print("Ranking Materializer")
+    print("=" * 60)
+
+    df = load_scholars()
+    print(f"\nLoaded {len(df)} scholars")
+    write_site_files(materialize(df))
+    export_rollups(build_cube(df, concept_id=CONCEPT_ID))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Multi-Field Batch Run
+
+Run the scholar pipeline for several OpenAlex concepts in one job. Field
+listings are fetched concurrently, authors that appear in several fields
+are deduplicated and their works are downloaded once into the shared
+ScholarStore, split OpenAlex profiles of one person are consolidated, and
+every derived metric (academic age, early career impact, category,
+within-sample field-normalized citation indicators) is computed once per
+person. Output is one ranking per field plus a combined author table.
+
+Usage:
+    python multi_field_batch.py [CONCEPT_ID ...] [--limit N]
+
+Dependencies:
+    pip install requests pandas
+"""
+
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import pandas as pd
+
+from citation_percentiles import author_indicators, update_from_store
+from consolidate_authors import cluster_authors, merge_metrics, merged_works
+from early_career_citations import early_career_from_works, first_year_from_works
+from fetch_comp_neuro_scholars import EMAIL, categorize_scholars, get_authors_by_concept, parse_author
+from openalex_client import enable_archive, get_author_works_all, short_id
+from scholar_store import ScholarStore
+from topic_classifier import weighted_concepts
+
+# Default fields: neuroscience and ML sub-fields
+FIELDS = {
+    "C15286952": "Computational Neuroscience",
+    "C169760540": "Neuroscience",
+    "C154945302": "Artificial Intelligence",
+    "C119857082": "Machine Learning",
+    "C108583219": "Deep Learning",
+}
+OUTPUT_DIR = "../data/fields"
+FIELD_WORKERS = 4
+AUTHOR_WORKERS = 4
+# Re-download works older than this many days
+WORKS_MAX_AGE_DAYS = 30
+
+
+def fetch_field(concept_id, store, limit=100, email=None):
+    """Fetch one field's author listing into the shared store."""
+    authors = get_authors_by_concept(concept_id, limit=limit, email=email, store=store)
+    print(f"[{concept_id}] {len(authors)} authors")
+    return concept_id, [short_id(a["id"]) for a in authors]
+
+
+def ensure_works(author_id, store, email=None):
+    """Download an author's works unless the store already has them. Returns True if fetched."""
+    if store.has_works(author_id, max_age_days=WORKS_MAX_AGE_DAYS):
+        return False
+    works = get_author_works_all(author_id, email)
+    if works is None:
+        # Incomplete download: do not mark the author as works-complete
+        print(f"  Works download failed for {author_id}, will retry next run")
+        return False
+    store.put_works(author_id, works)
+    return True
+
+
+def derive_author_row(author_id, store, fields, aliases=()):
+    """Compute the combined-table row for one person (author id plus split-profile aliases) from stored data."""
+    row = parse_author(store.get_author(author_id))
+    works = merged_works(store, [author_id, *aliases])
+    if aliases:
+        profiles = pd.DataFrame([row] + [parse_author(store.get_author(a)) for a in aliases])
+        row = merge_metrics(profiles, works)
+    current_year = datetime.now().year
+
+    first_year = first_year_from_works(works)
+    early_citations, early_works, top_papers = early_career_from_works(works, first_year, years=5)
+    academic_age = current_year - first_year if first_year else None
+
+    row.update({
+        "fields": "|".join(fields),
+        "first_pub_year": first_year,
+        "academic_age": academic_age,
+        "m_index": round(row["h_index"] / max(academic_age, 1), 2) if academic_age is not None else None,
+        "early_works_count": early_works,
+        "early_career_citations": early_citations,
+        "early_pct": round(early_citations / row["cited_by_count"] * 100, 1) if early_citations and row["cited_by_count"] else 0,
+        "top_paper_1": top_papers[0]["title"] if top_papers else "",
+    })
+    return row
+
+
+def run_batch(concept_ids, limit=100, email=None, store=None):
+    """Run all fields and return (combined DataFrame, {concept_id: ranking DataFrame})."""
+    store = store or ScholarStore()
+
+    # 1. Field listings, concurrently
+    with ThreadPoolExecutor(max_workers=FIELD_WORKERS) as pool:
+        listings = dict(pool.map(lambda c: fetch_field(c, store, limit, email), concept_ids))
+
+    memberships = {}
+    for concept_id, author_ids in listings.items():
+        for author_id in author_ids:
+            memberships.setdefault(author_id, []).append(concept_id)
+    total_listed = sum(len(ids) for ids in listings.values())
+    print(f"\n{total_listed} field memberships, {len(memberships)} unique authors")
+
+    # 2. Works, once per unique author
+    with ThreadPoolExecutor(max_workers=AUTHOR_WORKERS) as pool:
+        fetched = list(pool.map(lambda a: ensure_works(a, store, email), memberships))
+    print(f"Works downloaded for {sum(fetched)} authors, {len(fetched) - sum(fetched)} served from store")
+
+    # 3. Collapse split profiles (shared ORCID, full name + institution, co-authors)
+    profiles = pd.DataFrame([parse_author(store.get_author(a)) for a in memberships])
+    canonical = cluster_authors(profiles, store)
+    clusters = {}
+    for author_id, fields in memberships.items():
+        cluster = clusters.setdefault(canonical[author_id], {"aliases": [], "fields": []})
+        if author_id != canonical[author_id]:
+            cluster["aliases"].append(author_id)
+        cluster["fields"] += [f for f in fields if f not in cluster["fields"]]
+
+    # 4. Derived metrics, once per person
+    combined = pd.DataFrame([derive_author_row(a, store, c["fields"], c["aliases"]) for a, c in clusters.items()])
+    # Classify on the full score-weighted x_concepts / topics kept in the store
+    concepts = pd.Series([weighted_concepts(store.get_author(a)) for a in clusters], index=combined.index)
+    combined = categorize_scholars(combined, concepts=concepts)
+
+    # Within-sample indicators: cohort reference tables hold only the stored works
+    tables = update_from_store(store)
+    indicators = author_indicators(tables, {a: {w for m in [a, *c["aliases"]] for w in store.author_works.get(m, ())}
+                                            for a, c in clusters.items()})
+    indicators = indicators.reindex(combined["id"].map(short_id)).set_index(combined.index)
+    combined = pd.concat([combined, indicators], axis=1)
+    combined = combined.sort_values("cited_by_count", ascending=False)
+
+    # 5. Per-field rankings from the shared table
+    rankings = {}
+    for concept_id in concept_ids:
+        ids = {canonical[a] for a in listings.get(concept_id, [])}
+        ranking = combined[combined["id"].map(short_id).isin(ids)].copy()
+        ranking.insert(0, "rank", range(1, len(ranking) + 1))
+        rankings[concept_id] = ranking
+
+    return combined, rankings
+
+
+def save_outputs(combined, rankings, output_dir=OUTPUT_DIR):
+    os.makedirs(output_dir, exist_ok=True)
+    combined.to_csv(f"{output_dir}/combined_authors.csv", index=False, encoding="utf-8")
+    for concept_id, ranking in rankings.items():
+        ranking.to_csv(f"{output_dir}/{concept_id}_ranking.csv", index=False, encoding="utf-8")
+    print(f"\nSaved {len(rankings)} field rankings and combined table to {output_dir}/")
+
+
+def main():
+    args = sys.argv[1:]
+    limit = 100
+    if "--limit" in args:
+        idx = args.index("--limit")
+        limit = int(args[idx + 1])
+        del args[idx:idx + 2]
+    concept_ids = args or list(FIELDS)
+
+    print("=" * 60)
+    print("Multi-Field Batch Run")
+    print("=" * 60)
+    for concept_id in concept_ids:
+        print(f"  {concept_id}: {FIELDS.get(concept_id, '')}")
+
+    enable_archive()
+    combined, rankings = run_batch(concept_ids, limit=limit, email=EMAIL)
+    save_outputs(combined, rankings)
+
+    print("\n## Top 5 per field")
+    for concept_id, ranking in rankings.items():
+        print(f"\n  {FIELDS.get(concept_id, concept_id)}")
+        for _, row in ranking.head(5).iterrows():
+            print(f"    {row['rank']:2d}. {row['name']} ({row['cited_by_count']:,} citations)")
+
+
+if __name__ == "__main__":
+    main()
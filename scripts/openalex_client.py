@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Shared OpenAlex client used by the batch pipeline stages.
+
+Wraps requests with a process-wide polite rate limit so that concurrent
+field and author workers do not exceed the API's request budget, and
+provides cursor pagination for full works downloads and batched ID
+lookups. Identical requests issued concurrently are coalesced into one.
+When an archive is enabled, every raw response is also kept in the
+ResponseArchive.
+
+Dependencies:
+    pip install requests
+"""
+
+import threading
+import time
+from concurrent.futures import Future
+
+import requests
+
+OPENALEX_BASE = "https://api.openalex.org"
+# Minimum seconds between requests across all threads
+MIN_INTERVAL = 0.1
+
+_throttle_lock = threading.Lock()
+_last_request = [0.0]
+_session = requests.Session()
+# Optional ResponseArchive receiving every successful raw response
+_archive = [None]
+# In-flight requests (url, params) -> Future, for coalescing identical concurrent calls
+_inflight = {}
+_inflight_lock = threading.Lock()
+# Requests actually sent to the API by this process
+request_count = [0]
+
+
+def enable_archive(archive=None):
+    """Archive every raw response from now on (see response_archive.py)."""
+    if archive is None:
+        from response_archive import ResponseArchive
+        archive = ResponseArchive()
+    _archive[0] = archive
+    return archive
+
+
+def short_id(openalex_id):
+    """'https://openalex.org/A123' -> 'A123'."""
+    return str(openalex_id).rstrip("/").split("/")[-1]
+
+
+def _throttle():
+    with _throttle_lock:
+        wait = _last_request[0] + MIN_INTERVAL - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+        _last_request[0] = time.monotonic()
+
+
+def _fetch(url, params, timeout):
+    _throttle()
+    with _inflight_lock:
+        request_count[0] += 1
+    try:
+        resp = _session.get(url, params=params, timeout=timeout)
+        if resp.status_code != 200:
+            print(f"  HTTP {resp.status_code} for {url}")
+            return None
+        payload = resp.json()
+    except Exception as e:
+        print(f"  Error fetching {url}: {e}")
+        return None
+
+    # An archive failure must not cost the caller a good response
+    if _archive[0] is not None:
+        try:
+            _archive[0].append(url, params, payload)
+        except Exception as e:
+            print(f"  Archive error for {url}: {e}")
+    return payload
+
+
+def get_json(path, params=None, email=None, timeout=30):
+    """GET an OpenAlex endpoint (path like '/works' or a full URL). Returns None on failure.
+
+    Concurrent identical requests are coalesced: only the first caller hits
+    the API and the others wait for and share its (read-only) payload.
+    """
+    url = path if path.startswith("http") else f"{OPENALEX_BASE}{path}"
+    params = dict(params or {})
+    if email:
+        params["mailto"] = email
+
+    key = (url, tuple(sorted((k, str(v)) for k, v in params.items())))
+    with _inflight_lock:
+        future = _inflight.get(key)
+        owner = future is None
+        if owner:
+            future = _inflight[key] = Future()
+    if not owner:
+        return future.result()
+
+    payload = None
+    try:
+        payload = _fetch(url, params, timeout)
+    finally:
+        with _inflight_lock:
+            del _inflight[key]
+        future.set_result(payload)
+    return payload
+
+
+def get_all_pages(path, params=None, email=None, per_page=200, max_results=None, on_page=None):
+    """Follow OpenAlex cursor pagination and return all results.
+
+    Returns None if any page fails, so a partial list is never mistaken for
+    a complete one. on_page, if given, is called before every page request
+    (e.g. to charge a request budget).
+    """
+    params = dict(params or {})
+    params["per_page"] = per_page
+    params["cursor"] = "*"
+    results = []
+
+    while params["cursor"]:
+        if on_page:
+            on_page()
+        data = get_json(path, params, email)
+        if data is None:
+            return None
+        if not data.get("results"):
+            break
+        results.extend(data["results"])
+        if max_results and len(results) >= max_results:
+            return results[:max_results]
+        params["cursor"] = data.get("meta", {}).get("next_cursor")
+
+    return results
+
+
+def get_author(author_id, email=None):
+    """Fetch a single raw author record."""
+    return get_json(f"/authors/{short_id(author_id)}", email=email)
+
+
+def get_author_works_all(author_id, email=None, on_page=None):
+    """Download every work for an author (raw records). None if any page failed."""
+    return get_all_pages("/works", {"filter": f"author.id:{short_id(author_id)}"}, email, on_page=on_page)
+
+
+def get_batched(path, ids, select=None, email=None, batch_size=50):
+    """Fetch many entities by ID with OR-filter batches ('openalex:X1|X2|...'), one request per batch."""
+    ids = [short_id(i) for i in ids]
+    results = []
+    for start in range(0, len(ids), batch_size):
+        params = {"filter": "openalex:" + "|".join(ids[start:start + batch_size]), "per_page": batch_size}
+        if select:
+            params["select"] = select
+        data = get_json(path, params, email)
+        if data:
+            results.extend(data.get("results", []))
+    return results
+
+
+def get_works_batched(work_ids, select=None, email=None, batch_size=50):
+    """Fetch many works by ID, batch_size per request."""
+    return get_batched("/works", work_ids, select, email, batch_size)
+
+
+def get_authors_batched(author_ids, select=None, email=None, batch_size=50):
+    """Fetch many author profiles by ID, batch_size per request."""
+    return get_batched("/authors", author_ids, select, email, batch_size)
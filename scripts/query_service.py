@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Scholar Query Service
+
+Lightweight read-only HTTP service over the pipeline output. On startup it
+builds sorted indexes per metric and hash indexes on country, institution
+and category, so filter / sort / paginate queries and single-scholar
+lookups are answered in milliseconds. Responses carry an ETag derived from
+the dataset version, and conditional requests get 304 without recomputing.
+
+Endpoints:
+    GET /scholars?country=US&category=...&sort=h_index&order=desc&offset=0&limit=50&min_cited_by_count=1000
+    GET /scholars/<id>        scholar row plus profile details when available
+    GET /facets               counts per country / institution / category
+    GET /health
+
+Usage:
+    python query_service.py [--port 8765] [--data ../data/comp_neuro_scholars_analyzed.csv]
+
+Dependencies:
+    pip install pandas
+"""
+
+import argparse
+import hashlib
+import json
+import os
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+
+from openalex_client import short_id
+
+DATA_PATH = "../data/comp_neuro_scholars_analyzed.csv"
+DETAILS_PATH = "../scholar-viz/src/data/scholarDetails.json"
+SORT_METRICS = ["cited_by_count", "h_index", "i10_index", "works_count", "2yr_mean_citedness",
+                "m_index", "academic_age", "early_career_citations", "early_pct"]
+HASH_FIELDS = ["country", "institution", "category"]
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+
+
+def _clean(value):
+    if isinstance(value, float) and value != value:  # NaN check
+        return None
+    return value
+
+
+class ScholarIndex:
+    """In-memory indexes over scholar rows."""
+
+    def __init__(self, rows, details=None, version=""):
+        self.rows = rows
+        self.details = details or {}
+        self.version = version
+        self.by_id = {row["id"]: i for i, row in enumerate(rows)}
+
+        # (metric, order) -> row indices; missing values always last, id breaks ties
+        self.sorted = {}
+        for metric in SORT_METRICS:
+            present = [i for i, row in enumerate(rows) if row.get(metric) is not None]
+            if not present:
+                continue
+            missing = [i for i, row in enumerate(rows) if row.get(metric) is None]
+            ascending = sorted(present, key=lambda i: (rows[i][metric], rows[i]["id"]))
+            descending = sorted(present, key=lambda i: (-rows[i][metric], rows[i]["id"]))
+            self.sorted[(metric, "asc")] = ascending + missing
+            self.sorted[(metric, "desc")] = descending + missing
+        self.positions = {}
+        for key, ordered in self.sorted.items():
+            position = [0] * len(rows)
+            for rank, i in enumerate(ordered):
+                position[i] = rank
+            self.positions[key] = position
+
+        self.hashes = {field: {} for field in HASH_FIELDS}
+        for i, row in enumerate(rows):
+            for field in HASH_FIELDS:
+                value = row.get(field)
+                if value:
+                    self.hashes[field].setdefault(str(value).lower(), set()).add(i)
+
+    @classmethod
+    def from_files(cls, data_path=DATA_PATH, details_path=DETAILS_PATH):
+        df = pd.read_csv(data_path)
+        rows = [{k: _clean(v) for k, v in r.items()} for r in df.to_dict("records")]
+        for row in rows:
+            row["id"] = short_id(row["id"])
+
+        details = {}
+        if details_path and os.path.exists(details_path):
+            with open(details_path, encoding="utf-8") as f:
+                details = {d["id"]: d for d in json.load(f)}
+
+        digest = hashlib.sha1()
+        for path in (data_path, details_path):
+            if path and os.path.exists(path):
+                with open(path, "rb") as f:
+                    digest.update(f.read())
+        return cls(rows, details, digest.hexdigest()[:16])
+
+    def query(self, filters=None, sort="cited_by_count", order="desc", offset=0, limit=DEFAULT_LIMIT, minimums=None):
+        """Filter by hash-indexed fields and metric minimums, then sort and paginate."""
+        if (sort, order) not in self.sorted:
+            raise ValueError(f"unknown sort metric or order: {sort} {order}")
+        unknown = set(minimums or {}) - set(SORT_METRICS)
+        if unknown:
+            raise ValueError(f"unknown minimum metric: {', '.join(sorted(unknown))}")
+        offset, limit = max(0, offset), max(0, limit)
+
+        candidates = None
+        for field, value in (filters or {}).items():
+            members = self.hashes[field].get(str(value).lower(), set())
+            candidates = members if candidates is None else candidates & members
+
+        ordered = self.sorted[(sort, order)]
+
+        def keep(i):
+            row = self.rows[i]
+            return all((row.get(m) or 0) >= v for m, v in (minimums or {}).items())
+
+        if candidates is None:
+            matches = [i for i in ordered if keep(i)] if minimums else ordered
+        elif len(candidates) * 8 < len(ordered):
+            # Small candidate set: sort it by precomputed rank instead of scanning the index
+            position = self.positions[(sort, order)]
+            matches = sorted((i for i in candidates if keep(i)), key=position.__getitem__)
+        else:
+            matches = [i for i in ordered if i in candidates and keep(i)]
+
+        page = [self.rows[i] for i in matches[offset:offset + limit]]
+        return {"total": len(matches), "offset": offset, "limit": limit, "results": page}
+
+    def get(self, scholar_id):
+        idx = self.by_id.get(short_id(scholar_id))
+        if idx is None:
+            return None
+        return dict(self.rows[idx], details=self.details.get(self.rows[idx]["id"]))
+
+    def facets(self, top=50):
+        return {
+            field: sorted(((k, len(v)) for k, v in values.items()), key=lambda kv: -kv[1])[:top]
+            for field, values in self.hashes.items()
+        }
+
+
+def make_handler(index):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            etag = '"' + hashlib.sha1(f"{index.version}{self.path}".encode()).hexdigest()[:20] + '"'
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return
+
+            try:
+                status, body = self.route(url.path, parse_qs(url.query))
+            except ValueError as e:
+                status, body = 400, {"error": str(e)}
+            except Exception as e:
+                # Always answer; never drop the connection
+                status, body = 500, {"error": f"internal error: {e}"}
+            self.send_json(status, body, etag if status == 200 else None)
+
+        def route(self, path, qs):
+            parts = [p for p in path.split("/") if p]
+            if parts == ["health"]:
+                return 200, {"status": "ok", "version": index.version, "scholars": len(index.rows)}
+            if parts == ["facets"]:
+                return 200, index.facets()
+            if parts == ["scholars"]:
+                arg = lambda k, d=None: qs.get(k, [d])[0]
+                filters = {f: arg(f) for f in HASH_FIELDS if arg(f)}
+                minimums = {k[4:]: float(v[0]) for k, v in qs.items() if k.startswith("min_")}
+                limit = min(int(arg("limit", DEFAULT_LIMIT)), MAX_LIMIT)
+                return 200, index.query(filters, arg("sort", "cited_by_count"), arg("order", "desc"),
+                                        int(arg("offset", 0)), limit, minimums)
+            if len(parts) == 2 and parts[0] == "scholars":
+                scholar = index.get(parts[1])
+                return (200, scholar) if scholar else (404, {"error": "not found"})
+            return 404, {"error": "not found"}
+
+        def send_json(self, status, body, etag=None):
+            data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.send_header("Access-Control-Allow-Origin", "*")
+            if etag:
+                self.send_header("ETag", etag)
+                self.send_header("Cache-Control", "public, max-age=60")
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Read-only scholar query service")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--data", default=DATA_PATH)
+    parser.add_argument("--details", default=DETAILS_PATH)
+    args = parser.parse_args()
+
+    index = ScholarIndex.from_files(args.data, args.details)
+    print(f"Indexed {len(index.rows)} scholars ({len(index.sorted) // 2} sort metrics), version {index.version}")
+    print(f"Serving on http://localhost:{args.port}")
+    ThreadingHTTPServer(("", args.port), make_handler(index)).serve_forever()
+
+
+if __name__ == "__main__":
+    main()
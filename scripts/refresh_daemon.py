@@ -0,0 +1,371 @@
+#!/usr/bin/env python3
+"""
+Scheduled Refresh Daemon
+
+Keep scholar profiles fresh continuously instead of re-running every
+script by hand. Each tracked author gets a refresh interval derived from:
+
+    rank        top-ranked scholars are refreshed more often
+    velocity    citation growth per year since the last refresh
+    volatility  how much the author's rank moved recently
+
+Authors sit in a heapq priority queue ordered by their next due time
+(last refresh + interval), so the most overdue, fastest-moving scholars
+come first and dormant profiles wait up to MAX_INTERVAL_DAYS. Requests
+are paced by a token bucket holding the hourly API budget. Works are only
+re-downloaded when the profile's counts changed. Updated profiles go to
+the ScholarStore, and profile detail records are re-exported only for the
+shards whose content changed:
+
+    ../scholar-viz/public/data/details/shard_XX.json
+    ../scholar-viz/public/data/details/manifest.json
+
+The site builds its profile pages from
+../scholar-viz/src/data/scholarDetails.json, so every re-exported record
+is also patched into that file in place (other scholars and their order
+are left untouched).
+
+Usage:
+    python refresh_daemon.py [--budget 3600] [--once]
+    python refresh_daemon.py status
+
+Dependencies:
+    pip install requests pandas
+"""
+
+import hashlib
+import heapq
+import json
+import math
+import os
+import sys
+import time
+import zlib
+
+import pandas as pd
+
+from early_career_citations import early_career_from_works, first_year_from_works
+from fetch_comp_neuro_scholars import EMAIL, parse_author
+from fetch_scholar_details import build_scholar_detail, clean_nan, parse_work, yearly_from_works
+from openalex_client import get_author, get_author_works_all, short_id
+from scholar_store import ScholarStore
+
+DATA_PATH = "../data/comp_neuro_scholars_raw.csv"
+STATE_PATH = "../data/refresh_state.json"
+SHARD_DIR = "../scholar-viz/public/data/details"
+DETAILS_PATH = "../scholar-viz/src/data/scholarDetails.json"
+NUM_SHARDS = 32
+REQUESTS_PER_HOUR = 3600
+
+BASE_INTERVAL_DAYS = 14
+MIN_INTERVAL_DAYS = 1
+MAX_INTERVAL_DAYS = 90
+VELOCITY_WEIGHT = 4.0      # per unit of yearly citation growth (0.25 = +25%/year)
+VOLATILITY_WEIGHT = 8.0    # per unit of relative rank change
+EMA_ALPHA = 0.3
+RETRY_SECONDS = 3600
+RERANK_EVERY = 50
+EXPORT_EVERY_SECONDS = 300
+MAX_IDLE_SLEEP = 600
+
+
+class TokenBucket:
+    """Hourly request budget; take() blocks until enough tokens are available."""
+
+    def __init__(self, per_hour, capacity=None):
+        self.rate = per_hour / 3600
+        self.capacity = capacity or max(1, per_hour // 60)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def take(self, n=1):
+        # Charges larger than the bucket are paid in capacity-sized installments
+        while n > 0:
+            chunk = min(n, self.capacity)
+            self._refill()
+            while self.tokens < chunk:
+                time.sleep((chunk - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= chunk
+            n -= chunk
+
+
+def shard_of(author_id):
+    return f"shard_{zlib.crc32(author_id.encode()) % NUM_SHARDS:02d}"
+
+
+def early_data_from_works(works, cited_by_count, years=5):
+    """Early-career fields in the early_career_citations.csv shape, from stored works."""
+    first_year = first_year_from_works(works)
+    if not first_year:
+        return {}
+    citations, count, top_papers = early_career_from_works(works, first_year, years)
+    return {
+        "first_pub_year": first_year,
+        "early_career_end": first_year + years - 1,
+        "early_works_count": count,
+        "early_career_citations": citations,
+        "early_pct": round(citations / cited_by_count * 100, 1) if cited_by_count else 0,
+        "top_paper_1": top_papers[0]["title"] if top_papers else "",
+    }
+
+
+def detail_from_store(store, author_id):
+    """Build a profile detail record purely from stored data (no API calls).
+
+    Returns None unless the store has both the profile and a works download:
+    a profile alone would export empty top works, yearly data and early career.
+    """
+    details = store.get_author(author_id)
+    if not details or not store.has_works(author_id):
+        return None
+    raw_works = store.get_works(author_id)
+    works = sorted((parse_work(w) for w in raw_works), key=lambda w: -(w["citations"] or 0))
+    row = parse_author(details)
+    early = early_data_from_works(raw_works, row["cited_by_count"])
+    return clean_nan(build_scholar_detail(row["id"], row["name"], details, works, yearly_from_works(raw_works),
+                                          early, row["institution"], row["country"]))
+
+
+def patch_shard(detail, output_dir=SHARD_DIR):
+    """Replace (or add) one profile record in its export shard. Returns the shard name."""
+    shard = shard_of(detail["id"])
+    path = os.path.join(output_dir, f"{shard}.json")
+    records = []
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            records = [r for r in json.load(f) if r.get("id") != detail["id"]]
+    records.append(detail)
+    os.makedirs(output_dir, exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(records, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp, path)
+    return shard
+
+
+def patch_details(details, path=DETAILS_PATH):
+    """Replace (or append) profile records in the site's scholarDetails.json. Returns the count patched."""
+    if not details:
+        return 0
+    records = []
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            records = json.load(f)
+    updates = {d["id"]: d for d in details}
+    records = [updates.pop(r.get("id"), r) for r in records] + list(updates.values())
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(records, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+    return len(details)
+
+
+class RefreshDaemon:
+    """Priority-scheduled refresh of tracked authors with shard-level re-export."""
+
+    def __init__(self, store, author_ids, state=None, budget=REQUESTS_PER_HOUR, email=None):
+        self.store = store
+        self.email = email
+        self.bucket = TokenBucket(budget)
+        self.state = state or {}
+        for author_id in author_ids:
+            self.state.setdefault(author_id, {"rank": None, "cites": None, "refreshed_at": 0,
+                                              "velocity": 0.0, "volatility": 0.0, "detail_hash": None})
+        self.tracked = list(author_ids)
+        self.dirty_shards = set()
+        self.refreshes = 0
+        self.rerank()
+
+    # Scheduling
+
+    def interval_days(self, author_id):
+        s = self.state[author_id]
+        rank_weight = 2 / math.log2((s["rank"] or len(self.tracked)) + 2)
+        growth = s["velocity"] * 365 / max(s["cites"] or 0, 1)
+        urgency = rank_weight * (1 + VELOCITY_WEIGHT * growth + VOLATILITY_WEIGHT * s["volatility"])
+        return min(MAX_INTERVAL_DAYS, max(MIN_INTERVAL_DAYS, BASE_INTERVAL_DAYS / urgency))
+
+    def due(self, author_id):
+        s = self.state[author_id]
+        return max(s["refreshed_at"] + self.interval_days(author_id) * 86400, s.get("retry_at", 0))
+
+    def rerank(self):
+        """Recompute ranks by citations, update rank volatility and rebuild the queue."""
+        def cites(a):
+            record = self.store.get_author(a)
+            return record.get("cited_by_count", 0) if record else (self.state[a]["cites"] or 0)
+
+        ordered = sorted(self.tracked, key=lambda a: -cites(a))
+        for rank, author_id in enumerate(ordered, 1):
+            s = self.state[author_id]
+            if s["rank"] is not None:
+                change = abs(rank - s["rank"]) / s["rank"]
+                s["volatility"] = (1 - EMA_ALPHA) * s["volatility"] + EMA_ALPHA * change
+            s["rank"] = rank
+        self.queue = [(self.due(a), a) for a in self.tracked]
+        heapq.heapify(self.queue)
+
+    # Refresh
+
+    def refresh(self, author_id):
+        """Re-fetch one author. Returns the number of API requests spent."""
+        s = self.state[author_id]
+        self.bucket.take(1)
+        data = get_author(author_id, self.email)
+        if not data:
+            s["retry_at"] = time.time() + RETRY_SECONDS
+            return 1
+        requests_used = 1
+
+        previous = self.store.get_author(author_id) or {}
+        changed = (data.get("cited_by_count") != previous.get("cited_by_count")
+                   or data.get("works_count") != previous.get("works_count"))
+        if changed or not self.store.has_works(author_id):
+            pages = [0]
+
+            def charge_page():
+                # One token per page actually requested, however many the works count predicts
+                self.bucket.take(1)
+                pages[0] += 1
+
+            works = get_author_works_all(author_id, self.email, on_page=charge_page)
+            requests_used += pages[0]
+            if works is None:
+                # Keep the old works and profile; retry the whole refresh later
+                s["retry_at"] = time.time() + RETRY_SECONDS
+                return requests_used
+            self.store.put_works(author_id, works)
+        self.store.put_author(data)
+
+        now = time.time()
+        cites = data.get("cited_by_count") or 0
+        if s["cites"] is not None and s["refreshed_at"]:
+            days = max((now - s["refreshed_at"]) / 86400, 1 / 24)
+            velocity = max(cites - s["cites"], 0) / days
+            s["velocity"] = (1 - EMA_ALPHA) * s["velocity"] + EMA_ALPHA * velocity
+        s["cites"] = cites
+        s["refreshed_at"] = now
+
+        detail = detail_from_store(self.store, author_id)
+        digest = hashlib.sha1(json.dumps(detail, sort_keys=True, ensure_ascii=False).encode()).hexdigest()
+        if digest != s["detail_hash"]:
+            s["detail_hash"] = digest
+            self.dirty_shards.add(shard_of(author_id))
+        return requests_used
+
+    # Export
+
+    def export_dirty_shards(self, output_dir=SHARD_DIR, details_path=DETAILS_PATH):
+        """Rewrite only the shards that contain a changed profile and patch them into scholarDetails.json."""
+        if not self.dirty_shards:
+            return 0
+        os.makedirs(output_dir, exist_ok=True)
+        members = {}
+        for author_id in self.tracked:
+            members.setdefault(shard_of(author_id), []).append(author_id)
+
+        exported = []
+        for shard in sorted(self.dirty_shards):
+            records = [d for d in (detail_from_store(self.store, a) for a in members.get(shard, [])) if d]
+            tmp = os.path.join(output_dir, f"{shard}.json.tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(records, f, ensure_ascii=False, separators=(",", ":"))
+            os.replace(tmp, os.path.join(output_dir, f"{shard}.json"))
+            exported += records
+        patch_details(exported, details_path)
+
+        with open(os.path.join(output_dir, "manifest.json"), "w", encoding="utf-8") as f:
+            json.dump({"shards": NUM_SHARDS, "hash": "crc32", "updated": int(time.time()),
+                       "scholars": len(self.tracked)}, f)
+        count = len(self.dirty_shards)
+        print(f"  Re-exported {count} shard(s) ({len(exported)} profiles patched into {details_path}): "
+              f"{', '.join(sorted(self.dirty_shards))}")
+        self.dirty_shards.clear()
+        return count
+
+    def save_state(self, path=STATE_PATH):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.state, f)
+
+    # Main loop
+
+    def run(self, once=False):
+        """Refresh due authors forever (or until nothing is due, with once=True)."""
+        last_export = time.monotonic()
+        try:
+            while self.queue:
+                due, author_id = self.queue[0]
+                now = time.time()
+                if due > now:
+                    self.export_dirty_shards()
+                    self.save_state()
+                    if once:
+                        break
+                    time.sleep(min(due - now, MAX_IDLE_SLEEP))
+                    continue
+
+                heapq.heappop(self.queue)
+                used = self.refresh(author_id)
+                self.refreshes += 1
+                s = self.state[author_id]
+                print(f"[{self.refreshes}] {author_id} rank {s['rank']}: {s['cites']:,} citations, "
+                      f"{used} request(s), next in {self.interval_days(author_id):.1f} days")
+                heapq.heappush(self.queue, (self.due(author_id), author_id))
+
+                if self.refreshes % RERANK_EVERY == 0:
+                    self.rerank()
+                if time.monotonic() - last_export >= EXPORT_EVERY_SECONDS:
+                    self.export_dirty_shards()
+                    self.save_state()
+                    last_export = time.monotonic()
+        except KeyboardInterrupt:
+            print("\nStopping...")
+        self.export_dirty_shards()
+        self.save_state()
+
+
+def load_tracked(data_path=DATA_PATH):
+    """OpenAlex author ids to keep fresh (Google Scholar placeholders have no profile)."""
+    ids = [short_id(i) for i in pd.read_csv(data_path)["id"]]
+    return [i for i in ids if not i.startswith("GS_")]
+
+
+def load_state(path=STATE_PATH):
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    return {}
+
+
+def main():
+    args = sys.argv[1:]
+    budget = REQUESTS_PER_HOUR
+    if "--budget" in args:
+        budget = int(args[args.index("--budget") + 1])
+
+    daemon = RefreshDaemon(ScholarStore(), load_tracked(), load_state(), budget=budget, email=EMAIL)
+
+    if "status" in args:
+        now = time.time()
+        print(f"{len(daemon.tracked)} tracked authors, next 20 due:")
+        for due, author_id in heapq.nsmallest(20, daemon.queue):
+            s = daemon.state[author_id]
+            when = "now" if due <= now else f"in {(due - now) / 3600:.1f}h"
+            print(f"  {author_id:14s} rank {s['rank']:4d}  {when:>10s}  interval {daemon.interval_days(author_id):.1f}d")
+        return
+
+    print("=" * 60)
+    print("Scheduled Refresh Daemon")
+    print("=" * 60)
+    print(f"{len(daemon.tracked)} tracked authors, budget {budget} requests/hour")
+    daemon.run(once="--once" in args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+Cross-Stage Request Planner
+
+Several stages issue the same OpenAlex queries for the same scholars: the
+academic-age step and the early-career stage both ask for the first
+publication year, and profile details are fetched by more than one stage.
+The planner collects the data requirements of every enabled stage for a
+scholar set, drops identical and subsumed queries, and runs only the
+minimal request set:
+
+    author          profile record, batched 50 ids per request
+    works_all       full works download (ceil(works_count / 200) pages)
+    first_year      first publication year            (1 request)
+    early_works     works of the first 5 years        (1 request)
+    top_works       30 most cited works               (1 request)
+    yearly_counts   works per publication year        (1 request)
+
+A full works download satisfies every other works query, so per author it
+is chosen whenever a stage needs it anyway or its page count is no higher
+than the separate queries it replaces. Anything fresh in the ScholarStore
+or in the query cache costs nothing. Requests run concurrently and
+identical in-flight requests are coalesced by the client.
+
+Results land in the ScholarStore (profiles, full works) and in
+../data/planned_queries.json (separate query results); stages read them
+back with RequestPlanner.resolve().
+
+Usage:
+    python request_planner.py [--stages scholars,early_career,details] [--max-age 7] [--dry-run]
+
+Dependencies:
+    pip install requests pandas
+"""
+
+import json
+import math
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+import openalex_client
+from early_career_citations import (early_career_from_works, first_year_from_works, get_early_career_citations,
+                                    get_first_work)
+from fetch_scholar_details import get_author_works, get_yearly_citations, parse_work, yearly_from_works
+from openalex_client import get_author_works_all, get_authors_batched, short_id
+
+DATA_PATH = "../data/comp_neuro_scholars_raw.csv"
+CACHE_PATH = "../data/planned_queries.json"
+MAX_AGE_DAYS = 7
+MAX_WORKERS = 8
+WORKS_PER_PAGE = 200
+AUTHORS_PER_BATCH = 50
+EARLY_YEARS = 5
+TOP_WORKS_LIMIT = 30
+
+# Data each stage needs per scholar
+STAGE_REQUIREMENTS = {
+    "scholars": {"first_year"},                         # academic age
+    "early_career": {"first_year", "early_works"},
+    "details": {"author", "top_works", "yearly_counts"},
+    "indicators": {"works_all"},
+    "network": {"works_all"},
+}
+# Requirements a full works download satisfies
+DERIVABLE = {"first_year", "early_works", "top_works", "yearly_counts"}
+
+
+class QueryCache:
+    """Results of separate (non-subsumed) queries: {author id: {kind: {value, fetched_at}}}."""
+
+    def __init__(self, path=CACHE_PATH):
+        self.path = path
+        self.entries = {}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.entries = json.load(f)
+
+    def get(self, author_id, kind, max_age_days=None):
+        entry = self.entries.get(author_id, {}).get(kind)
+        if not entry:
+            return None
+        if max_age_days is not None and \
+                datetime.now() - datetime.fromisoformat(entry["fetched_at"]) > timedelta(days=max_age_days):
+            return None
+        return entry
+
+    def put(self, author_id, kind, value):
+        with self._lock:
+            self.entries.setdefault(author_id, {})[kind] = {
+                "value": value, "fetched_at": datetime.now().isoformat(timespec="seconds")}
+
+    def save(self):
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, ensure_ascii=False, separators=(",", ":"))
+
+
+class RequestPlanner:
+    """Minimal request set covering the requirements of several stages."""
+
+    def __init__(self, store, author_ids, stages, email=None, works_counts=None, max_age_days=MAX_AGE_DAYS,
+                 cache=None):
+        self.store = store
+        self.email = email
+        self.stages = list(stages)
+        # Google Scholar placeholders have no OpenAlex profile
+        self.author_ids = list(dict.fromkeys(a for a in map(short_id, author_ids) if not a.startswith("GS_")))
+        self.works_counts = {short_id(k): v for k, v in (works_counts or {}).items()}
+        self.max_age_days = max_age_days
+        self.cache = cache or QueryCache()
+        self.needs = set().union(*(STAGE_REQUIREMENTS[s] for s in self.stages)) if self.stages else set()
+
+    def _pages(self, author_id):
+        count = self.works_counts.get(author_id)
+        if count is None or count != count:
+            count = (self.store.get_author(author_id) or {}).get("works_count") or 0
+        return max(1, math.ceil(count / WORKS_PER_PAGE))
+
+    def _has_works(self, author_id):
+        return self.store.has_works(author_id, self.max_age_days)
+
+    def naive_cost(self):
+        """Requests the enabled stages would issue when each runs on its own."""
+        cost = {}
+        for stage in self.stages:
+            per_author = [self._pages(a) if kind == "works_all" else 1
+                          for a in self.author_ids for kind in STAGE_REQUIREMENTS[stage]]
+            cost[stage] = sum(per_author)
+        return cost
+
+    def plan(self):
+        """{"authors": ids to fetch in batches, "works_all": ids, "queries": {id: [kinds]}}."""
+        plan = {"authors": [], "works_all": [], "queries": {}}
+        derived = self.needs & DERIVABLE
+        for author_id in self.author_ids:
+            if "author" in self.needs and not self.store.has_author(author_id, self.max_age_days):
+                plan["authors"].append(author_id)
+            if self._has_works(author_id):
+                continue
+            missing = {k for k in derived if not self.cache.get(author_id, k, self.max_age_days)}
+            if "early_works" in missing and not self.cache.get(author_id, "first_year", self.max_age_days):
+                # The early-works window starts at the first publication year
+                missing.add("first_year")
+            if "works_all" in self.needs or (missing and self._pages(author_id) <= len(missing)):
+                plan["works_all"].append(author_id)
+            elif missing:
+                plan["queries"][author_id] = sorted(missing, key=["first_year", "early_works", "top_works",
+                                                                   "yearly_counts"].index)
+        return plan
+
+    def planned_cost(self, plan):
+        return (math.ceil(len(plan["authors"]) / AUTHORS_PER_BATCH)
+                + sum(self._pages(a) for a in plan["works_all"])
+                + sum(len(kinds) for kinds in plan["queries"].values()))
+
+    def _run_queries(self, author_id, kinds):
+        # A failed query (None) is not cached, so the next plan asks again
+        first_year = None
+        failed = []
+        for kind in kinds:
+            if kind == "first_year":
+                work = get_first_work(author_id, self.email)
+                if work is None:
+                    failed.append(kind)
+                    continue
+                value = first_year = work.get("publication_year")
+            elif kind == "early_works":
+                if "first_year" in failed:
+                    # No window start: the early-works result would be wrong
+                    failed.append(kind)
+                    continue
+                if first_year is None:
+                    first_year = (self.cache.get(author_id, "first_year") or {}).get("value")
+                value = get_early_career_citations(author_id, first_year, EARLY_YEARS, self.email)
+                value = None if value is None else list(value)
+            elif kind == "top_works":
+                value = get_author_works(author_id, self.email, limit=TOP_WORKS_LIMIT)
+            else:
+                value = get_yearly_citations(author_id, self.email)
+            if value is None:
+                failed.append(kind)
+                continue
+            self.cache.put(author_id, kind, value)
+        if failed:
+            print(f"  Queries failed for {author_id}: {', '.join(failed)}")
+
+    def _download_works(self, author_id):
+        works = get_author_works_all(author_id, self.email)
+        if works is None:
+            print(f"  Works download failed for {author_id}")
+            return
+        self.store.put_works(author_id, works)
+
+    def execute(self, plan=None):
+        """Run a plan (default: a fresh one). Returns the number of requests sent."""
+        plan = plan or self.plan()
+        before = openalex_client.request_count[0]
+
+        for author_data in get_authors_batched(plan["authors"], email=self.email):
+            self.store.put_author(author_data)
+
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+            jobs = [pool.submit(self._download_works, a) for a in plan["works_all"]]
+            jobs += [pool.submit(self._run_queries, a, kinds) for a, kinds in plan["queries"].items()]
+            for done, job in enumerate(jobs, 1):
+                job.result()
+                if done % 50 == 0:
+                    print(f"  Progress: {done}/{len(jobs)} authors")
+        self.cache.save()
+        return openalex_client.request_count[0] - before
+
+    def resolve(self, author_id, kind):
+        """A requirement's value for one author, from stored works or the query cache (no API calls).
+
+        Fresh stored works win, then a fresh cache entry; older data is used only when nothing fresh exists.
+        """
+        author_id = short_id(author_id)
+        if kind == "author":
+            return self.store.get_author(author_id)
+        entry = self.cache.get(author_id, kind, self.max_age_days)
+        if self._has_works(author_id) or (entry is None and self.store.has_works(author_id)):
+            works = self.store.get_works(author_id)
+            if kind == "first_year":
+                return first_year_from_works(works)
+            if kind == "early_works":
+                return early_career_from_works(works, first_year_from_works(works), EARLY_YEARS)
+            if kind == "top_works":
+                return sorted((parse_work(w) for w in works), key=lambda w: -(w["citations"] or 0))[:TOP_WORKS_LIMIT]
+            if kind == "yearly_counts":
+                return yearly_from_works(works)
+        entry = entry or self.cache.get(author_id, kind)
+        if entry is None:
+            return None
+        return tuple(entry["value"]) if kind == "early_works" else entry["value"]
+
+
+def planner_for_csv(stages, data_path=DATA_PATH, store=None, email=None, max_age_days=MAX_AGE_DAYS):
+    """RequestPlanner over the scholars of a pipeline CSV (works counts taken from the CSV)."""
+    from scholar_store import ScholarStore
+    df = pd.read_csv(data_path)
+    works_counts = dict(zip(df["id"], df["works_count"])) if "works_count" in df else None
+    return RequestPlanner(store or ScholarStore(), df["id"], stages, email, works_counts, max_age_days)
+
+
+def main():
+    from fetch_comp_neuro_scholars import EMAIL
+
+    args = sys.argv[1:]
+    stages = args[args.index("--stages") + 1].split(",") if "--stages" in args else list(STAGE_REQUIREMENTS)
+    max_age = float(args[args.index("--max-age") + 1]) if "--max-age" in args else MAX_AGE_DAYS
+
+    print("=" * 60)
+    print("Cross-Stage Request Planner")
+    print("=" * 60)
+
+    planner = planner_for_csv(stages, email=EMAIL, max_age_days=max_age)
+    plan = planner.plan()
+    naive = planner.naive_cost()
+    planned = planner.planned_cost(plan)
+
+    print(f"{len(planner.author_ids)} scholars, stages: {', '.join(stages)}")
+    for stage, cost in naive.items():
+        print(f"  {stage:14s} {cost:8,} requests when run separately")
+    print(f"  {'total':14s} {sum(naive.values()):8,}")
+    print(f"\nPlanned: {planned:,} requests ({len(plan['authors'])} profiles in batches, "
+          f"{len(plan['works_all'])} full works downloads, {len(plan['queries'])} authors with separate queries)")
+
+    if "--dry-run" in args:
+        return
+    sent = planner.execute(plan)
+    print(f"\nDone: {sent:,} requests sent")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+"""
+Raw Response Archive
+
+Append-only, compressed archive of every raw OpenAlex response fetched via
+openalex_client. Responses are compressed one by one with a dictionary
+trained on OpenAlex JSON (zstd when available, zlib preset dictionary
+otherwise) and written to size-capped segment files with a JSON Lines
+index, so single records stay randomly accessible. Each index entry names
+its codec, so an archive written with zstandard installed still reads its
+zlib records without it (and the reverse). The index is loaded into a
+key -> (segment, entry) map when the archive is opened; lookups only read
+index lines appended since.
+
+The reprocess mode re-runs parse_author and the works parsers over the
+archive, so a newly needed field costs CPU time instead of a new crawl.
+
+Usage:
+    python response_archive.py stats
+    python response_archive.py train
+    python response_archive.py reprocess
+
+Dependencies:
+    pip install pandas
+    pip install zstandard   # optional, better ratio than the zlib fallback
+"""
+
+import fcntl
+import json
+import os
+import sys
+import time
+import zlib
+
+import pandas as pd
+
+try:
+    import zstandard as zstd
+except ImportError:
+    zstd = None
+
+ARCHIVE_DIR = "../data/archive"
+SEGMENT_MAX_BYTES = 64 * 1024 * 1024
+DICT_SIZE = 112 * 1024
+# Train the dictionary automatically once this many records are archived
+DICT_TRAIN_SAMPLES = 500
+ZLIB_DICT_SIZE = 32 * 1024  # zlib only uses the last 32KB of a preset dictionary
+# Codec used for new records, and codecs this environment can read
+WRITE_CODEC = "zstd" if zstd else "zlib"
+READABLE_CODECS = ("zstd", "zlib") if zstd else ("zlib",)
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+
+def request_key(url, params=None):
+    """Stable key for a request (mailto is not part of the identity)."""
+    params = {k: v for k, v in (params or {}).items() if k != "mailto"}
+    query = "&".join(f"{k}={params[k]}" for k in sorted(params))
+    return f"{url}?{query}" if query else url
+
+
+def response_kind(url):
+    path = url.split("api.openalex.org")[-1]
+    if path.startswith("/works"):
+        return "works"
+    if path.startswith("/authors/"):
+        return "author"
+    if path.startswith("/authors"):
+        return "authors"
+    return "other"
+
+
+class Codec:
+    """Dictionary compressor ("zstd" or "zlib"); dict_id 0 means no dictionary."""
+
+    def __init__(self, dict_id=0, dict_bytes=None, name=WRITE_CODEC):
+        self.name = name
+        self.dict_id = dict_id
+        self.dict_bytes = dict_bytes
+        if name == "zstd":
+            zdict = zstd.ZstdCompressionDict(dict_bytes) if dict_bytes else None
+            self._compressor = zstd.ZstdCompressor(level=9, dict_data=zdict)
+            self._decompressor = zstd.ZstdDecompressor(dict_data=zdict)
+
+    def compress(self, data):
+        if self.name == "zstd":
+            return self._compressor.compress(data)
+        if self.dict_bytes:
+            c = zlib.compressobj(9, zdict=self.dict_bytes)
+        else:
+            c = zlib.compressobj(9)
+        return c.compress(data) + c.flush()
+
+    def decompress(self, data):
+        if self.name == "zstd":
+            return self._decompressor.decompress(data)
+        if self.dict_bytes:
+            d = zlib.decompressobj(zdict=self.dict_bytes)
+        else:
+            d = zlib.decompressobj()
+        return d.decompress(data) + d.flush()
+
+
+def train_dictionary(samples):
+    """Build a compression dictionary from sample JSON payloads."""
+    if zstd:
+        return zstd.train_dictionary(DICT_SIZE, samples).as_bytes()
+    # zlib: most useful content goes last; recent (common) samples at the end
+    return b"".join(samples)[-ZLIB_DICT_SIZE:]
+
+
+class ResponseArchive:
+    """Segmented, indexed, append-only archive of raw API responses."""
+
+    def __init__(self, root=ARCHIVE_DIR):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        # (codec name, dict id) -> Codec
+        self.codecs = {(name, 0): Codec(0, None, name) for name in READABLE_CODECS}
+        self._untrained = None
+        self._load_dictionaries()
+        # request key -> (segment, latest index entry), and index bytes read per segment
+        self._index = {}
+        self._index_read = {}
+        self._refresh_index()
+
+    # Dictionaries
+
+    def _load_dictionaries(self):
+        for filename in os.listdir(self.root):
+            base, _, ext = filename.partition(".")
+            if base.startswith("dict_") and ext in READABLE_CODECS:
+                dict_id = int(base[5:])
+                with open(os.path.join(self.root, filename), "rb") as f:
+                    self.codecs[(ext, dict_id)] = Codec(dict_id, f.read(), ext)
+
+    def _dict_ids(self, name=None):
+        return [dict_id for codec_name, dict_id in self.codecs if name is None or codec_name == name]
+
+    @property
+    def current_codec(self):
+        return self.codecs[(WRITE_CODEC, max(self._dict_ids(WRITE_CODEC)))]
+
+    def _codec(self, entry, data):
+        # Entries written before the codec was recorded: zstd frames carry a magic number
+        name = entry.get("codec") or ("zstd" if data[:4] == ZSTD_MAGIC else "zlib")
+        key = (name, entry["dict"])
+        if key not in self.codecs:
+            if name not in READABLE_CODECS:
+                raise RuntimeError(f"Archive record is {name}-compressed; pip install zstandard to read it")
+            # Trained by another process since we opened the archive
+            self._load_dictionaries()
+        return self.codecs[key]
+
+    def _decompress(self, entry, data):
+        return self._codec(entry, data).decompress(data)
+
+    def _locked(self):
+        lock = open(os.path.join(self.root, ".lock"), "a")
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        return lock
+
+    def train(self, max_samples=5000, force=False):
+        """Train a new dictionary from archived records; later appends use it."""
+        samples = [raw for _, raw in zip(range(max_samples), self.iter_raw())]
+        if len(samples) < 10:
+            print("Not enough archived responses to train a dictionary")
+            return None
+        dict_bytes = train_dictionary(samples)
+
+        with self._locked():
+            known = len(self._dict_ids(WRITE_CODEC))
+            self._load_dictionaries()
+            if len(self._dict_ids(WRITE_CODEC)) > known and not force:
+                return max(self._dict_ids(WRITE_CODEC))  # another worker trained one meanwhile
+            dict_id = max(self._dict_ids()) + 1
+            with open(os.path.join(self.root, f"dict_{dict_id}.{WRITE_CODEC}"), "wb") as f:
+                f.write(dict_bytes)
+            self.codecs[(WRITE_CODEC, dict_id)] = Codec(dict_id, dict_bytes, WRITE_CODEC)
+        print(f"Trained dictionary {dict_id} from {len(samples)} responses ({len(dict_bytes):,} bytes)")
+        return dict_id
+
+    # Segments
+
+    def _segments(self):
+        return sorted(n[:-4] for n in os.listdir(self.root) if n.startswith("segment_") and n.endswith(".dat"))
+
+    def _paths(self, segment):
+        base = os.path.join(self.root, segment)
+        return base + ".dat", base + ".idx"
+
+    def _writable_segment(self):
+        segments = self._segments()
+        if segments:
+            dat, _ = self._paths(segments[-1])
+            if os.path.getsize(dat) < SEGMENT_MAX_BYTES:
+                return segments[-1]
+        return f"segment_{len(segments) + 1:06d}"
+
+    def append(self, url, params, payload):
+        """Archive one response payload (parsed JSON)."""
+        raw = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        codec = self.current_codec
+        blob = codec.compress(raw)
+
+        with self._locked():
+            segment = self._writable_segment()
+            dat, idx = self._paths(segment)
+            with open(dat, "ab") as f:
+                offset = f.tell()
+                f.write(blob)
+            entry = {
+                "key": request_key(url, params),
+                "kind": response_kind(url),
+                "offset": offset,
+                "length": len(blob),
+                "raw_length": len(raw),
+                "codec": codec.name,
+                "dict": codec.dict_id,
+                "ts": int(time.time()),
+            }
+            with open(idx, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+
+        if len(self._dict_ids(WRITE_CODEC)) == 1:
+            self._untrained = self.count() if self._untrained is None else self._untrained + 1
+            if self._untrained >= DICT_TRAIN_SAMPLES:
+                self.train()
+
+    def iter_index(self):
+        for segment in self._segments():
+            _, idx = self._paths(segment)
+            if not os.path.exists(idx):
+                continue
+            with open(idx, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        yield segment, json.loads(line)
+
+    def count(self):
+        return sum(1 for _ in self.iter_index())
+
+    def iter_raw(self, kinds=None):
+        """Decompressed JSON bytes for every record, reading each segment sequentially."""
+        for segment in self._segments():
+            dat, idx = self._paths(segment)
+            if not os.path.exists(idx):
+                continue
+            with open(dat, "rb") as f:
+                blob = f.read()
+            with open(idx, encoding="utf-8") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    entry = json.loads(line)
+                    if kinds and entry["kind"] not in kinds:
+                        continue
+                    data = blob[entry["offset"]:entry["offset"] + entry["length"]]
+                    yield self._decompress(entry, data)
+
+    def iter_records(self, kinds=None):
+        for raw in self.iter_raw(kinds):
+            yield json.loads(raw)
+
+    def _refresh_index(self):
+        """Read index lines appended (by any process) since the last refresh into the key map."""
+        for segment in self._segments():
+            _, idx = self._paths(segment)
+            if not os.path.exists(idx):
+                continue
+            start = self._index_read.get(segment, 0)
+            if os.path.getsize(idx) == start:
+                continue
+            with open(idx, "rb") as f:
+                f.seek(start)
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break  # still being written
+                    start += len(line)
+                    if line.strip():
+                        entry = json.loads(line)
+                        self._index[entry["key"]] = (segment, entry)
+            self._index_read[segment] = start
+
+    def get(self, url, params=None):
+        """Latest archived payload for a request, or None."""
+        self._refresh_index()
+        found = self._index.get(request_key(url, params))
+        if not found:
+            return None
+        segment, entry = found
+        dat, _ = self._paths(segment)
+        with open(dat, "rb") as f:
+            f.seek(entry["offset"])
+            data = f.read(entry["length"])
+        return json.loads(self._decompress(entry, data))
+
+    def stats(self):
+        raw = compressed = n = 0
+        kinds = {}
+        for _, entry in self.iter_index():
+            n += 1
+            raw += entry["raw_length"]
+            compressed += entry["length"]
+            kinds[entry["kind"]] = kinds.get(entry["kind"], 0) + 1
+        return {"records": n, "raw_bytes": raw, "compressed_bytes": compressed, "kinds": kinds}
+
+
+def reprocess(archive, author_parser=None, work_parser=None):
+    """Re-run the parsers over every archived response. Returns (authors_df, works_df)."""
+    from fetch_comp_neuro_scholars import parse_author
+    from fetch_scholar_details import parse_work
+
+    author_parser = author_parser or parse_author
+    work_parser = work_parser or parse_work
+    authors = {}
+    works = {}
+
+    for payload in archive.iter_records():
+        if "results" in payload:
+            for item in payload["results"]:
+                item_id = item.get("id", "")
+                if "/A" in item_id:
+                    authors[item_id] = author_parser(item)
+                elif "/W" in item_id:
+                    works[item_id] = dict(work_parser(item), id=item_id)
+        elif "/A" in payload.get("id", ""):
+            authors[payload["id"]] = author_parser(payload)
+
+    return pd.DataFrame(list(authors.values())), pd.DataFrame(list(works.values()))
+
+
+def main():
+    command = sys.argv[1] if len(sys.argv) > 1 else "stats"
+    archive = ResponseArchive()
+
+    if command == "train":
+        archive.train(force=True)
+    elif command == "reprocess":
+        start = time.time()
+        authors_df, works_df = reprocess(archive)
+        authors_df.to_csv("../data/archive_authors.csv", index=False, encoding="utf-8")
+        works_df.to_csv("../data/archive_works.csv", index=False, encoding="utf-8")
+        print(f"Reprocessed {len(authors_df)} authors and {len(works_df)} works in {time.time() - start:.1f}s")
+    else:
+        s = archive.stats()
+        ratio = s["compressed_bytes"] / s["raw_bytes"] if s["raw_bytes"] else 0
+        print(f"Records: {s['records']:,} {s['kinds']}")
+        print(f"Raw JSON: {s['raw_bytes']:,} bytes | Archived: {s['compressed_bytes']:,} bytes ({ratio:.1%})")
+
+
+if __name__ == "__main__":
+    main()
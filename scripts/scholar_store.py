@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Local scholar store shared by pipeline stages and fields.
+
+Raw OpenAlex author and work records are kept in append-only JSON Lines
+files (latest record for an ID wins). An in-memory index is built on open,
+so repeated runs and overlapping fields reuse what was already fetched
+instead of crawling again. A complete works download also records the
+author's work IDs, which then replace whatever the author's works were
+before (works merged or removed in OpenAlex drop out).
+
+Layout:
+    ../data/store/authors.jsonl  {"id", "fetched_at", "works_fetched_at", "work_ids", "data"}
+    ../data/store/works.jsonl    {"id", "fetched_at", "data"}
+"""
+
+import fcntl
+import json
+import os
+import threading
+from datetime import datetime, timedelta
+
+from openalex_client import short_id
+
+STORE_DIR = "../data/store"
+
+
+def _now():
+    return datetime.now().isoformat(timespec="seconds")
+
+
+class ScholarStore:
+    """Append-only authors/works store with an in-memory ID index."""
+
+    def __init__(self, root=STORE_DIR):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self.authors_path = os.path.join(root, "authors.jsonl")
+        self.works_path = os.path.join(root, "works.jsonl")
+        self.authors = {}
+        self.works = {}
+        self.author_works = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        for record in self._read(self.authors_path):
+            self._merge_author(record)
+        for record in self._read(self.works_path):
+            self._index_work(record)
+
+    @staticmethod
+    def _read(path):
+        if not os.path.exists(path):
+            return
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+
+    def _append(self, path, records):
+        lines = "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records)
+        with open(path, "a", encoding="utf-8") as f:
+            # Several worker processes may append to the same store
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                f.write(lines)
+                f.flush()
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _merge_author(self, record):
+        # Records from concurrent writers may carry only the profile or only the works stamp
+        previous = self.authors.get(record["id"])
+        if previous:
+            if record.get("data") is None:
+                record = dict(record, data=previous["data"], fetched_at=previous["fetched_at"])
+            if not record.get("works_fetched_at"):
+                record = dict(record, works_fetched_at=previous.get("works_fetched_at"))
+            if "work_ids" not in record:
+                record = dict(record, work_ids=previous.get("work_ids"))
+        self.authors[record["id"]] = record
+        if record.get("work_ids") is not None:
+            self.author_works[record["id"]] = set(record["work_ids"])
+
+    def _index_work(self, record):
+        self.works[record["id"]] = record
+        for authorship in record["data"].get("authorships", []):
+            author_id = authorship.get("author", {}).get("id")
+            if not author_id:
+                continue
+            author_id = short_id(author_id)
+            # Authors with a complete download keep exactly that work list
+            if (self.authors.get(author_id) or {}).get("work_ids") is None:
+                self.author_works.setdefault(author_id, set()).add(record["id"])
+
+    # Authors
+
+    def put_author(self, data, works_fetched_at=None):
+        author_id = short_id(data["id"])
+        with self._lock:
+            previous = self.authors.get(author_id, {})
+            record = {
+                "id": author_id,
+                "fetched_at": _now(),
+                "works_fetched_at": works_fetched_at or previous.get("works_fetched_at"),
+                "data": data,
+            }
+            self._append(self.authors_path, [record])
+            self._merge_author(record)
+        return self.authors[author_id]
+
+    def get_author(self, author_id):
+        record = self.authors.get(short_id(author_id))
+        return record["data"] if record else None
+
+    def has_author(self, author_id, max_age_days=None):
+        return self._is_fresh(self.authors.get(short_id(author_id)), "fetched_at", max_age_days)
+
+    # Works
+
+    def put_works(self, author_id, works):
+        """Store an author's complete works list, replacing their previous one, and mark them works-complete."""
+        author_id = short_id(author_id)
+        fetched_at = _now()
+        records = [{"id": short_id(w["id"]), "fetched_at": fetched_at, "data": w} for w in works]
+        with self._lock:
+            self._append(self.works_path, records)
+            # Author may not be known yet (e.g. written by another worker); keep a stub
+            author = self.authors.get(author_id) or {"id": author_id, "fetched_at": None, "data": None}
+            author = dict(author, works_fetched_at=fetched_at, work_ids=[r["id"] for r in records])
+            self._append(self.authors_path, [author])
+            self._merge_author(author)
+            for record in records:
+                self._index_work(record)
+
+    def update_works(self, fields):
+        """Merge extra fields ({work id: {field: value}}) into stored works, e.g. references fetched later."""
+        with self._lock:
+            records = [{"id": w, "fetched_at": self.works[w]["fetched_at"], "data": {**self.works[w]["data"], **f}}
+                       for w, f in ((short_id(w), f) for w, f in fields.items()) if w in self.works]
+            self._append(self.works_path, records)
+            for record in records:
+                self._index_work(record)
+        return len(records)
+
+    def get_works(self, author_id):
+        """Raw works for an author, as far as the store knows them."""
+        ids = self.author_works.get(short_id(author_id), ())
+        return [self.works[w]["data"] for w in ids if w in self.works]
+
+    def has_works(self, author_id, max_age_days=None):
+        return self._is_fresh(self.authors.get(short_id(author_id)), "works_fetched_at", max_age_days)
+
+    @staticmethod
+    def _is_fresh(record, field, max_age_days):
+        if not record or not record.get(field):
+            return False
+        if max_age_days is None:
+            return True
+        fetched = datetime.fromisoformat(record[field])
+        return datetime.now() - fetched <= timedelta(days=max_age_days)
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Full-Text Search Index
+
+Build an inverted index over scholar names, institutions, research topics
+and work titles. Text is normalized (Unicode diacritic folding, lowercase,
+punctuation stripped) and postings are stored as delta-encoded document ID
+lists. The last query term matches as a prefix against the sorted
+vocabulary, so "gers" finds "Gershman".
+
+The index is exported as sharded static files (one shard per two-letter
+term prefix) for the site, and can be queried directly from Python.
+
+Usage:
+    python search_index.py build [--store]
+    python search_index.py query "karl fris"
+
+Dependencies:
+    (standard library only)
+"""
+
+import json
+import os
+import re
+import shutil
+import sys
+import unicodedata
+from bisect import bisect_left
+
+SCHOLARS_PATH = "../scholar-viz/src/data/scholars.json"
+DETAILS_PATH = "../scholar-viz/src/data/scholarDetails.json"
+EXPORT_DIR = "../scholar-viz/public/search"
+SHARD_PREFIX_LEN = 2
+STOPWORDS = {"a", "an", "and", "for", "in", "of", "on", "the", "to", "with", "by", "at", "from"}
+
+_non_word = re.compile(r"[^0-9a-z]+")
+
+
+def fold(text):
+    """Lowercase and strip diacritics: 'Müller' -> 'muller'."""
+    decomposed = unicodedata.normalize("NFKD", str(text))
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).lower()
+
+
+def tokenize(text):
+    return [t for t in _non_word.split(fold(text)) if t and t not in STOPWORDS]
+
+
+def delta_encode(ids):
+    previous = 0
+    out = []
+    for i in ids:
+        out.append(i - previous)
+        previous = i
+    return out
+
+
+def delta_decode(deltas):
+    total = 0
+    out = []
+    for d in deltas:
+        total += d
+        out.append(total)
+    return out
+
+
+class SearchIndex:
+    """Documents plus term -> sorted doc id postings."""
+
+    def __init__(self):
+        self.docs = []        # {"t": type, "l": label, "r": scholar id or None}
+        self.postings = {}
+        self._seen = {}
+        self._vocabulary = None
+
+    def add(self, doc_type, label, ref=None, extra_text=""):
+        """Add a document once per (type, label, ref); returns its id."""
+        if not label:
+            return None
+        key = (doc_type, fold(label), ref)
+        if key in self._seen:
+            return self._seen[key]
+        doc_id = len(self.docs)
+        self.docs.append({"t": doc_type, "l": label, "r": ref})
+        self._seen[key] = doc_id
+        for term in set(tokenize(f"{label} {extra_text}")):
+            self.postings.setdefault(term, []).append(doc_id)
+        self._vocabulary = None
+        return doc_id
+
+    @property
+    def vocabulary(self):
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self.postings)
+        return self._vocabulary
+
+    def prefix_terms(self, prefix):
+        """Every vocabulary term starting with prefix (one sorted range, no cap)."""
+        vocab = self.vocabulary
+        return vocab[bisect_left(vocab, prefix):bisect_left(vocab, prefix + "\uffff")]
+
+    def search(self, query, doc_type=None, limit=20, prefix=True):
+        """AND query; the last term matches as a prefix. Returns matching docs."""
+        terms = tokenize(query)
+        if not terms:
+            return []
+        sets = []
+        for i, term in enumerate(terms):
+            if prefix and i == len(terms) - 1:
+                ids = set()
+                for t in self.prefix_terms(term):
+                    ids.update(self.postings[t])
+            else:
+                ids = set(self.postings.get(term, ()))
+            sets.append(ids)
+        sets.sort(key=len)
+        matches = set.intersection(*sets)
+        results = [dict(self.docs[i], id=i) for i in sorted(matches)]
+        if doc_type:
+            results = [r for r in results if r["t"] == doc_type]
+        return results[:limit]
+
+    def export(self, output_dir=EXPORT_DIR):
+        """Write docs.json, manifest.json and terms/<prefix>.json shards."""
+        if os.path.exists(output_dir):
+            shutil.rmtree(output_dir)
+        os.makedirs(os.path.join(output_dir, "terms"))
+
+        shards = {}
+        for term in self.vocabulary:
+            shards.setdefault(term[:SHARD_PREFIX_LEN], {})[term] = delta_encode(self.postings[term])
+
+        for shard, terms in shards.items():
+            with open(os.path.join(output_dir, "terms", f"{shard}.json"), "w", encoding="utf-8") as f:
+                json.dump(terms, f, separators=(",", ":"))
+        with open(os.path.join(output_dir, "docs.json"), "w", encoding="utf-8") as f:
+            json.dump([[d["t"], d["l"], d["r"]] for d in self.docs], f, ensure_ascii=False, separators=(",", ":"))
+        with open(os.path.join(output_dir, "manifest.json"), "w", encoding="utf-8") as f:
+            json.dump({
+                "docs": len(self.docs),
+                "terms": len(self.postings),
+                "prefixLength": SHARD_PREFIX_LEN,
+                "shards": sorted(shards),
+                "encoding": "delta",
+            }, f, separators=(",", ":"))
+        print(f"Search index exported to {output_dir}: {len(self.docs):,} docs, {len(self.postings):,} terms, {len(shards)} shards")
+
+    @classmethod
+    def load(cls, output_dir=EXPORT_DIR):
+        """Load an exported index back into memory."""
+        index = cls()
+        with open(os.path.join(output_dir, "docs.json"), encoding="utf-8") as f:
+            index.docs = [{"t": t, "l": l, "r": r} for t, l, r in json.load(f)]
+        terms_dir = os.path.join(output_dir, "terms")
+        for name in os.listdir(terms_dir):
+            with open(os.path.join(terms_dir, name), encoding="utf-8") as f:
+                for term, deltas in json.load(f).items():
+                    index.postings[term] = delta_decode(deltas)
+        return index
+
+
+def build_index(scholars_path=SCHOLARS_PATH, details_path=DETAILS_PATH, store=None):
+    """Index scholars, institutions, topics and work titles from the site data (and optionally the store)."""
+    index = SearchIndex()
+
+    with open(scholars_path, encoding="utf-8") as f:
+        scholars = json.load(f)
+    for s in scholars:
+        scholar_id = s["id"].split("/")[-1]
+        index.add("scholar", s["name"], scholar_id)
+        index.add("institution", s.get("institution"))
+
+    if os.path.exists(details_path):
+        with open(details_path, encoding="utf-8") as f:
+            details = json.load(f)
+        for d in details:
+            index.add("institution", d.get("institution"))
+            for topic in d.get("topics", []):
+                index.add("topic", topic.get("name"))
+            for work in d.get("topWorks", []):
+                index.add("work", work.get("title"), d["id"])
+
+    if store is not None:
+        for work_id, record in store.works.items():
+            data = record["data"]
+            authorships = data.get("authorships") or []
+            first = authorships[0].get("author", {}).get("id", "") if authorships else ""
+            index.add("work", data.get("title") or data.get("display_name"), first.split("/")[-1] or None)
+            for topic in data.get("topics") or []:
+                index.add("topic", topic.get("display_name"))
+
+    return index
+
+
+def main():
+    command = sys.argv[1] if len(sys.argv) > 1 else "build"
+
+    if command == "query":
+        index = SearchIndex.load()
+        for doc in index.search(" ".join(sys.argv[2:])):
+            print(f"  [{doc['t']}] {doc['l']}" + (f"  ({doc['r']})" if doc["r"] else ""))
+        return
+
+    store = None
+    if "--store" in sys.argv:
+        from scholar_store import ScholarStore
+        store = ScholarStore()
+    index = build_index(store=store)
+    index.export()
+
+
+if __name__ == "__main__":
+    main()
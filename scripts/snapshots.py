@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+Versioned Data Snapshots
+
+Every run overwrites the pipeline outputs, so rank movement over time
+could not be shown or audited. This keeps dated snapshots of:
+
+    scholars      ../data/comp_neuro_scholars_raw.csv
+    early_career  ../data/early_career_citations.csv
+    details       ../scholar-viz/src/data/scholarDetails.json
+
+Records are stored content-addressed: each scholar record is hashed and
+written to the object pack only if that exact record was never seen, and a
+snapshot manifest is just the list of record hashes per source. Nested
+values (the topics, topWorks and yearlyData lists of a profile detail) are
+objects of their own, referenced from the record by hash, so a scholar
+whose citation counts moved still shares the unchanged lists with earlier
+snapshots and only a small record is written. A year of daily snapshots
+where most scholars do not change costs little more than one copy plus
+the manifests.
+
+The diff engine joins two snapshots on the scholar key in a single outer
+merge and reports status (added / removed / changed), per-metric deltas
+and rank changes.
+
+Layout:
+    ../data/snapshots/objects.pack        "<hash>\\t<record or nested value json>" lines
+    ../data/snapshots/manifests/<label>.json
+
+Usage:
+    python snapshots.py create [LABEL]
+    python snapshots.py list
+    python snapshots.py diff OLD NEW [--source scholars] [--top 20] [--output PATH]
+
+Dependencies:
+    pip install pandas
+"""
+
+import fcntl
+import hashlib
+import json
+import os
+import sys
+from datetime import datetime
+
+import pandas as pd
+
+SNAPSHOT_DIR = "../data/snapshots"
+SOURCES = {
+    "scholars": "../data/comp_neuro_scholars_raw.csv",
+    "early_career": "../data/early_career_citations.csv",
+    "details": "../scholar-viz/src/data/scholarDetails.json",
+}
+# Metrics compared by the diff engine, per source (the first one also defines rank)
+DIFF_METRICS = {
+    "scholars": ["cited_by_count", "h_index", "i10_index", "works_count", "2yr_mean_citedness"],
+    "early_career": ["early_career_citations", "early_pct", "total_citations", "h_index"],
+    "details": ["citedByCount", "hIndex", "i10Index", "worksCount", "twoYearMeanCitedness"],
+}
+
+
+PARTS_KEY = "_parts"
+
+
+def record_hash(record):
+    canonical = json.dumps(record, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.sha1(canonical.encode("utf-8")).hexdigest()[:20]
+
+
+def read_source(path):
+    """Records of a CSV or JSON list file (NaN -> None)."""
+    if path.endswith(".json"):
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    df = pd.read_csv(path)
+    return [{k: (None if isinstance(v, float) and v != v else v) for k, v in r.items()} for r in df.to_dict("records")]
+
+
+def source_key(records):
+    """Scholar key of a source: id when present, otherwise name."""
+    return "id" if records and "id" in records[0] else "name"
+
+
+class SnapshotStore:
+    """Content-addressed record pack plus one manifest per snapshot."""
+
+    def __init__(self, root=SNAPSHOT_DIR):
+        self.root = root
+        self.pack_path = os.path.join(root, "objects.pack")
+        self.manifest_dir = os.path.join(root, "manifests")
+        os.makedirs(self.manifest_dir, exist_ok=True)
+        self.offsets = {}
+        self.pack_size = 0
+        if os.path.exists(self.pack_path):
+            with open(self.pack_path, "rb") as f:
+                self._scan(f)
+
+    def _scan(self, f):
+        """Index the pack lines from self.pack_size on (objects appended by other processes)."""
+        f.seek(self.pack_size)
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            self.offsets[line[:20].decode()] = self.pack_size
+            self.pack_size += len(line)
+
+    def _write_objects(self, records):
+        """Append unseen records and nested values; returns the record hashes in order and the objects written."""
+        with open(self.pack_path, "ab+") as f:
+            # Several processes may snapshot at once: offsets are only valid under the lock
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                self._scan(f)
+                hashes = []
+                new_lines = []
+                offset = self.pack_size
+
+                def put(obj):
+                    nonlocal offset
+                    h = record_hash(obj)
+                    if h not in self.offsets:
+                        line = (h + "\t" + json.dumps(obj, ensure_ascii=False, default=str) + "\n").encode("utf-8")
+                        self.offsets[h] = offset
+                        offset += len(line)
+                        new_lines.append(line)
+                    return h
+
+                for record in records:
+                    # The record keeps its scalar fields and refers to each nested value by hash
+                    shell = {k: v for k, v in record.items() if not isinstance(v, (list, dict))}
+                    parts = {k: put(v) for k, v in record.items() if isinstance(v, (list, dict))}
+                    if parts:
+                        shell[PARTS_KEY] = parts
+                    hashes.append(put(shell))
+                if new_lines:
+                    f.write(b"".join(new_lines))
+                    f.flush()
+                    self.pack_size = offset
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+        return hashes, len(new_lines)
+
+    def create(self, label=None, sources=SOURCES):
+        """Snapshot the current pipeline outputs (re-creating a label replaces its manifest)."""
+        label = label or datetime.now().strftime("%Y-%m-%d")
+        manifest = {"label": label, "created_at": datetime.now().isoformat(timespec="seconds"), "sources": {}}
+        written = total = 0
+        for name, path in sources.items():
+            if not os.path.exists(path):
+                continue
+            records = read_source(path)
+            hashes, new = self._write_objects(records)
+            manifest["sources"][name] = {"path": path, "key": source_key(records), "records": hashes}
+            written += new
+            total += len(records)
+        with open(os.path.join(self.manifest_dir, f"{label}.json"), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, separators=(",", ":"))
+        print(f"Snapshot {label}: {total} records, {written} new objects ({len(self.offsets)} stored)")
+        return manifest
+
+    def labels(self):
+        return sorted(name[:-5] for name in os.listdir(self.manifest_dir) if name.endswith(".json"))
+
+    def manifest(self, label):
+        with open(os.path.join(self.manifest_dir, f"{label}.json"), encoding="utf-8") as f:
+            return json.load(f)
+
+    def get(self, h, f=None, parts=True):
+        """Read one record by hash with its nested values (f: an open pack file to reuse)."""
+        own = f is None
+        f = f or open(self.pack_path, "rb")
+        try:
+            f.seek(self.offsets[h])
+            record = json.loads(f.readline().split(b"\t", 1)[1])
+            refs = record.pop(PARTS_KEY, None) if isinstance(record, dict) else None
+            if refs and parts:
+                record.update((k, self.get(ref, f)) for k, ref in refs.items())
+            return record
+        finally:
+            if own:
+                f.close()
+
+    def load(self, label, source="scholars", parts=True):
+        """One source of a snapshot as a DataFrame, with a _hash column (parts=False skips nested values)."""
+        entry = self.manifest(label)["sources"][source]
+        with open(self.pack_path, "rb") as f:
+            records = [dict(self.get(h, f, parts), _hash=h) for h in entry["records"]]
+        return pd.DataFrame(records), entry["key"]
+
+
+def _ranks(df, metric):
+    return df[metric].rank(ascending=False, method="min")
+
+
+def diff(old, new, key, metrics):
+    """Per-scholar status, metric deltas and rank change between two snapshot frames (single merge)."""
+    rank_metric = metrics[0]
+    old = old[[key, "_hash"] + metrics].assign(rank=_ranks(old, rank_metric)).drop_duplicates(key)
+    new = new[[key, "_hash"] + metrics].assign(rank=_ranks(new, rank_metric)).drop_duplicates(key)
+
+    merged = old.merge(new, on=key, how="outer", suffixes=("_old", "_new"), indicator=True)
+    status = {"left_only": "removed", "right_only": "added", "both": "changed"}
+    merged["status"] = merged["_merge"].map(status).astype(str)
+    merged.loc[(merged["_merge"] == "both") & (merged["_hash_old"] == merged["_hash_new"]), "status"] = "unchanged"
+
+    for metric in metrics:
+        merged[f"{metric}_delta"] = pd.to_numeric(merged[f"{metric}_new"], errors="coerce") - \
+            pd.to_numeric(merged[f"{metric}_old"], errors="coerce")
+    # Positive = moved up
+    merged["rank_change"] = merged["rank_old"] - merged["rank_new"]
+    return merged.drop(columns=["_merge", "_hash_old", "_hash_new"])
+
+
+def diff_snapshots(store, old_label, new_label, source="scholars"):
+    # Only scalar metrics are compared; a changed nested value still changes the record hash
+    old, key = store.load(old_label, source, parts=False)
+    new, _ = store.load(new_label, source, parts=False)
+    return diff(old, new, key, DIFF_METRICS[source])
+
+
+def main():
+    args = sys.argv[1:]
+    command = args[0] if args else "create"
+    store = SnapshotStore()
+
+    if command == "create":
+        store.create(args[1] if len(args) > 1 else None)
+    elif command == "list":
+        for label in store.labels():
+            m = store.manifest(label)
+            counts = ", ".join(f"{k}: {len(v['records'])}" for k, v in m["sources"].items())
+            print(f"  {label}  ({m['created_at']})  {counts}")
+        print(f"{len(store.offsets)} distinct objects stored")
+    elif command == "diff":
+        source = args[args.index("--source") + 1] if "--source" in args else "scholars"
+        top = int(args[args.index("--top") + 1]) if "--top" in args else 20
+        result = diff_snapshots(store, args[1], args[2], source)
+        print(result["status"].value_counts().to_string())
+
+        movers = result[result["rank_change"].fillna(0) != 0]
+        movers = movers.reindex(movers["rank_change"].abs().sort_values(ascending=False).index)
+        print(f"\n## Largest rank changes ({args[1]} -> {args[2]})")
+        key = result.columns[0]
+        metric = DIFF_METRICS[source][0]
+        for _, row in movers.head(top).iterrows():
+            print(f"  {row[key]}: rank {int(row['rank_old'])} -> {int(row['rank_new'])} "
+                  f"({row['rank_change']:+.0f}), {metric} {row[f'{metric}_delta']:+,.0f}")
+
+        if "--output" in args:
+            output = args[args.index("--output") + 1]
+            result.to_csv(output, index=False, encoding="utf-8")
+            print(f"\nDiff saved to {output}")
+    else:
+        print(__doc__)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Memory-Mapped Store Index
+
+Opening a ScholarStore parses every line of the authors and works JSONL
+files, which is fine for batch stages but far too slow to fix or refresh a
+single profile. This keeps an ID-keyed byte-offset index next to the store
+as .npy arrays opened with mmap_mode="r":
+
+    author_ids / author_offsets    latest full author record per id
+    work_ids / work_offsets        latest record per work id
+    pair_authors / pair_works      author -> work id pairs (sorted by author)
+    complete_authors               authors whose pairs come from a complete works download
+
+A lookup is a binary search (np.searchsorted) on the sorted id arrays plus
+one seek into the memory-mapped JSONL file, so reading one scholar touches
+only that scholar's records. The index remembers how many bytes of each
+file it covers; when the store has grown, only the appended tail is
+scanned and merged in (a rewritten, shorter file forces a full rebuild).
+
+The index implements get_author / get_works / has_works like
+ScholarStore, so refresh_daemon.detail_from_store works on it directly. A
+rebuild recomputes one scholar's profile detail (metrics, topics, summary, impact
+categories, early career) and patches only that scholar's export shard and
+their record in the site's scholarDetails.json.
+
+Usage:
+    python store_index.py build
+    python store_index.py rebuild AUTHOR_ID [AUTHOR_ID ...]
+
+Dependencies:
+    pip install numpy
+"""
+
+import json
+import mmap
+import os
+import sys
+import time
+
+import numpy as np
+
+from openalex_client import short_id
+from scholar_store import STORE_DIR, ScholarStore
+
+ARRAYS = ("author_ids", "author_offsets", "work_ids", "work_offsets", "pair_authors", "pair_works",
+          "complete_authors")
+# Bumped when the array layout changes; older indexes are rebuilt
+INDEX_VERSION = 2
+
+
+def scan(path, start=0):
+    """(offset, record) for every complete line from byte offset start; also returns the end offset."""
+    records = []
+    end = start
+    if not os.path.exists(path):
+        return records, end
+    with open(path, "rb") as f:
+        f.seek(start)
+        offset = start
+        for line in f:
+            if not line.endswith(b"\n"):
+                # Line still being appended by a writer; picked up next time
+                break
+            if line.strip():
+                records.append((offset, json.loads(line)))
+            offset += len(line)
+        end = offset
+    return records, end
+
+
+def _id_array(ids):
+    return np.array([i.encode() for i in ids], dtype="S") if len(ids) else np.empty(0, dtype="S1")
+
+
+def latest(ids, offsets):
+    """Sort by id and keep the highest offset (the newest record) per id."""
+    order = np.lexsort((offsets, ids))
+    ids, offsets = ids[order], offsets[order]
+    keep = np.ones(len(ids), dtype=bool)
+    keep[:-1] = ids[:-1] != ids[1:]
+    return ids[keep], offsets[keep]
+
+
+def unique_pairs(left, right):
+    order = np.lexsort((right, left))
+    left, right = left[order], right[order]
+    keep = np.ones(len(left), dtype=bool)
+    keep[1:] = (left[1:] != left[:-1]) | (right[1:] != right[:-1])
+    return left[keep], right[keep]
+
+
+class StoreIndex:
+    """Read-only ID -> byte offset index over a ScholarStore directory."""
+
+    def __init__(self, root=STORE_DIR):
+        self.root = root
+        self.index_dir = os.path.join(root, "index")
+        self.authors_path = os.path.join(root, "authors.jsonl")
+        self.works_path = os.path.join(root, "works.jsonl")
+        self.meta_path = os.path.join(self.index_dir, "meta.json")
+        self._maps = {}
+        self.refresh()
+
+    # Building
+
+    def _files(self):
+        return {"authors": self.authors_path, "works": self.works_path}
+
+    def _sizes(self):
+        return {name: os.path.getsize(path) if os.path.exists(path) else 0 for name, path in self._files().items()}
+
+    def refresh(self):
+        """Bring the index up to date with the store files and map it."""
+        meta = None
+        if os.path.exists(self.meta_path):
+            with open(self.meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+        sizes = self._sizes()
+        indexed = meta["indexed"] if meta else {}
+        if meta and meta.get("version") != INDEX_VERSION:
+            meta = None
+        if meta and all(indexed.get(p) == s for p, s in sizes.items()):
+            self._load()
+            return 0
+        if not meta or any(indexed.get(p, 0) > s for p, s in sizes.items()):
+            self._clear()
+            indexed = {p: 0 for p in sizes}
+        else:
+            self._load()
+        return self._update(indexed)
+
+    def _clear(self):
+        empty_ids, empty_offsets = np.empty(0, dtype="S1"), np.empty(0, dtype=np.int64)
+        self.author_ids, self.author_offsets = empty_ids, empty_offsets
+        self.work_ids, self.work_offsets = empty_ids, empty_offsets
+        self.pair_authors, self.pair_works = empty_ids, empty_ids
+        self.complete_authors = empty_ids
+
+    def _update(self, indexed):
+        """Scan the unindexed tails of both files and merge them in. Returns the records added."""
+        authors, authors_end = scan(self.authors_path, indexed["authors"])
+        works, works_end = scan(self.works_path, indexed["works"])
+
+        # A complete works download replaces the author's pairs with its work list
+        complete = {r["id"]: r["work_ids"] for _, r in authors if r.get("work_ids") is not None}
+        # Works stubs written by put_works carry no profile
+        authors = [(offset, r["id"]) for offset, r in authors if r.get("data") is not None]
+        self.author_ids, self.author_offsets = latest(
+            np.concatenate([np.asarray(self.author_ids), _id_array([a for _, a in authors])]),
+            np.concatenate([np.asarray(self.author_offsets), np.array([o for o, _ in authors], dtype=np.int64)]))
+
+        self.work_ids, self.work_offsets = latest(
+            np.concatenate([np.asarray(self.work_ids), _id_array([r["id"] for _, r in works])]),
+            np.concatenate([np.asarray(self.work_offsets), np.array([o for o, _ in works], dtype=np.int64)]))
+
+        complete_ids = _id_array(sorted(complete))
+        known_complete = np.union1d(np.asarray(self.complete_authors), complete_ids)
+        pairs = [(short_id(a["author"]["id"]), r["id"]) for _, r in works
+                 for a in r["data"].get("authorships") or [] if (a.get("author") or {}).get("id")]
+        pairs = [(a, w) for a, w in pairs if not self._contains(known_complete, a)]
+        pairs += [(a, w) for a, ids in complete.items() for w in ids]
+        keep = ~np.isin(np.asarray(self.pair_authors), complete_ids)
+        self.pair_authors, self.pair_works = unique_pairs(
+            np.concatenate([np.asarray(self.pair_authors)[keep], _id_array([a for a, _ in pairs])]),
+            np.concatenate([np.asarray(self.pair_works)[keep], _id_array([w for _, w in pairs])]))
+        self.complete_authors = known_complete
+
+        self._save({"authors": authors_end, "works": works_end})
+        self._load()
+        return len(authors) + len(works)
+
+    def _save(self, indexed):
+        os.makedirs(self.index_dir, exist_ok=True)
+        for name in ARRAYS:
+            tmp = os.path.join(self.index_dir, f"{name}.tmp.npy")
+            np.save(tmp, getattr(self, name))
+            os.replace(tmp, os.path.join(self.index_dir, f"{name}.npy"))
+        with open(self.meta_path, "w", encoding="utf-8") as f:
+            json.dump({"version": INDEX_VERSION, "indexed": indexed, "authors": len(self.author_ids),
+                       "works": len(self.work_ids)}, f)
+
+    def _load(self):
+        for name in ARRAYS:
+            setattr(self, name, np.load(os.path.join(self.index_dir, f"{name}.npy"), mmap_mode="r"))
+        self._maps = {}
+
+    # Lookup
+
+    def _read(self, path, offset):
+        mapped = self._maps.get(path)
+        if mapped is None:
+            with open(path, "rb") as f:
+                mapped = self._maps[path] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        end = mapped.find(b"\n", offset)
+        return json.loads(mapped[offset:end if end >= 0 else len(mapped)])
+
+    @staticmethod
+    def _find(ids, key):
+        key = np.bytes_(key.encode())
+        i = np.searchsorted(ids, key)
+        return i if i < len(ids) and ids[i] == key else None
+
+    @classmethod
+    def _contains(cls, ids, key):
+        return cls._find(ids, key) is not None
+
+    def get_author(self, author_id):
+        i = self._find(self.author_ids, short_id(author_id))
+        return None if i is None else self._read(self.authors_path, int(self.author_offsets[i]))["data"]
+
+    def has_works(self, author_id, max_age_days=None):
+        author_id = short_id(author_id)
+        if max_age_days is None and self._contains(self.complete_authors, author_id):
+            return True
+        i = self._find(self.author_ids, author_id)
+        record = None if i is None else self._read(self.authors_path, int(self.author_offsets[i]))
+        return ScholarStore._is_fresh(record, "works_fetched_at", max_age_days)
+
+    def get_works(self, author_id):
+        """Raw works for an author, as far as the store knows them."""
+        key = np.bytes_(short_id(author_id).encode())
+        lo, hi = np.searchsorted(self.pair_authors, key, "left"), np.searchsorted(self.pair_authors, key, "right")
+        works = []
+        for work_id in self.pair_works[lo:hi]:
+            i = self._find(self.work_ids, work_id.decode())
+            if i is not None:
+                works.append(self._read(self.works_path, int(self.work_offsets[i]))["data"])
+        return works
+
+
+def rebuild(author_ids, index=None):
+    """Recompute the profile details of a few scholars from the store and patch their shards and site records."""
+    from refresh_daemon import detail_from_store, patch_details, patch_shard
+
+    index = index or StoreIndex()
+    rebuilt = []
+    for author_id in author_ids:
+        detail = detail_from_store(index, author_id)
+        if detail is None:
+            print(f"  {author_id}: no profile or works in the store")
+            continue
+        shard = patch_shard(detail)
+        print(f"  {author_id} ({detail['name']}): {detail['citedByCount']:,} citations, {shard} patched")
+        rebuilt.append(detail)
+    patch_details(rebuilt)
+    return rebuilt
+
+
+def main():
+    args = sys.argv[1:]
+    command = args[0] if args else "build"
+
+    if command == "build":
+        start = time.perf_counter()
+        index = StoreIndex()
+        print(f"Store index: {len(index.author_ids):,} authors, {len(index.work_ids):,} works, "
+              f"{len(index.pair_works):,} author-work pairs ({time.perf_counter() - start:.2f}s)")
+    elif command == "rebuild" and len(args) > 1:
+        start = time.perf_counter()
+        rebuild(args[1:])
+        print(f"Rebuilt {len(args) - 1} profile(s) in {(time.perf_counter() - start) * 1000:.0f} ms")
+    else:
+        print(__doc__)
+
+
+if __name__ == "__main__":
+    main()
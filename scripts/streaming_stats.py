@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+"""
+Streaming Field Statistics
+
+Accumulate field-wide distribution statistics (mean, median, percentiles)
+while authors are streamed in, using exact running moments plus a mergeable
+KLL quantile sketch per metric. Memory stays constant regardless of how many
+authors are processed, and partial results from parallel workers can be
+merged before exporting percentile tables to the site.
+
+Usage:
+    python streaming_stats.py [csv_path ...] [--workers N]
+
+Dependencies:
+    (standard library only)
+"""
+
+import csv
+import json
+import math
+import random
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+# Metrics tracked for each author record
+AUTHOR_METRICS = ["cited_by_count", "h_index", "i10_index", "works_count", "2yr_mean_citedness"]
+EARLY_CAREER_METRICS = ["early_career_citations", "early_works_count", "early_pct"]
+# Percentiles exported to the site
+PERCENTILES = [1, 5, 10, 25, 50, 75, 90, 95, 99]
+# KLL accuracy parameter (~1.7/k rank error)
+SKETCH_K = 200
+
+
+class RunningMoments:
+    """Exact count / mean / variance / min / max, mergeable across workers."""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def add(self, value):
+        self.count += 1
+        self.total += value
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def merge(self, other):
+        """Combine with another RunningMoments (Chan et al. parallel update)."""
+        if not other.count:
+            return self
+        if not self.count:
+            self.__dict__.update(other.__dict__)
+            return self
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    @property
+    def variance(self):
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def std(self):
+        return math.sqrt(self.variance)
+
+    def to_dict(self):
+        return dict(self.__dict__)
+
+    @classmethod
+    def from_dict(cls, data):
+        moments = cls()
+        moments.__dict__.update(data)
+        return moments
+
+
+class KLLSketch:
+    """KLL quantile sketch (Karnin, Lang, Liberty 2016).
+
+    Items live in a hierarchy of compactors; an item at level h stands for
+    2**h original values. Sketches built on different workers can be merged.
+    """
+
+    def __init__(self, k=SKETCH_K, seed=None):
+        self.k = k
+        self.n = 0
+        self.compactors = [[]]
+        self.size = 0
+        self.max_size = 0
+        self._rng = random.Random(seed)
+        self._update_max_size()
+
+    def _capacity(self, level):
+        depth = len(self.compactors) - level - 1
+        return int(math.ceil(self.k * (2 / 3) ** depth)) + 1
+
+    def _update_max_size(self):
+        self.max_size = sum(self._capacity(h) for h in range(len(self.compactors)))
+
+    def _grow(self):
+        self.compactors.append([])
+        self._update_max_size()
+
+    def _compress(self):
+        while self.size >= self.max_size:
+            for level, items in enumerate(self.compactors):
+                if len(items) >= self._capacity(level):
+                    if level + 1 >= len(self.compactors):
+                        self._grow()
+                    items.sort()
+                    offset = self._rng.randint(0, 1)
+                    self.compactors[level + 1].extend(items[offset::2])
+                    self.compactors[level] = []
+                    break
+            self.size = sum(len(c) for c in self.compactors)
+
+    def add(self, value):
+        self.compactors[0].append(value)
+        self.size += 1
+        self.n += 1
+        if self.size >= self.max_size:
+            self._compress()
+
+    def merge(self, other):
+        """Fold another sketch into this one."""
+        while len(self.compactors) < len(other.compactors):
+            self._grow()
+        for level, items in enumerate(other.compactors):
+            self.compactors[level].extend(items)
+        self.n += other.n
+        self.size = sum(len(c) for c in self.compactors)
+        self._compress()
+        return self
+
+    def _weighted_items(self):
+        items = []
+        for level, compactor in enumerate(self.compactors):
+            weight = 1 << level
+            items.extend((value, weight) for value in compactor)
+        items.sort()
+        return items
+
+    def quantile(self, q):
+        """Approximate value at quantile q (0-1)."""
+        return self.quantiles([q])[0]
+
+    def quantiles(self, qs):
+        items = self._weighted_items()
+        if not items:
+            return [None for _ in qs]
+        total = sum(w for _, w in items)
+        results = []
+        for q in qs:
+            target = q * total
+            cumulative = 0
+            value = items[-1][0]
+            for item, weight in items:
+                cumulative += weight
+                if cumulative >= target:
+                    value = item
+                    break
+            results.append(value)
+        return results
+
+    def rank(self, value):
+        """Approximate fraction of values <= value."""
+        items = self._weighted_items()
+        total = sum(w for _, w in items)
+        if not total:
+            return 0.0
+        return sum(w for item, w in items if item <= value) / total
+
+    def to_dict(self):
+        return {"k": self.k, "n": self.n, "compactors": self.compactors}
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(k=data["k"])
+        sketch.n = data["n"]
+        sketch.compactors = [list(c) for c in data["compactors"]]
+        sketch.size = sum(len(c) for c in sketch.compactors)
+        sketch._update_max_size()
+        return sketch
+
+
+class MetricSummary:
+    """Running moments plus quantile sketch for a single metric."""
+
+    def __init__(self, k=SKETCH_K):
+        self.moments = RunningMoments()
+        self.sketch = KLLSketch(k=k)
+
+    def add(self, value):
+        self.moments.add(value)
+        self.sketch.add(value)
+
+    def merge(self, other):
+        self.moments.merge(other.moments)
+        self.sketch.merge(other.sketch)
+        return self
+
+
+class FieldStatistics:
+    """Per-metric streaming statistics for a stream of author records."""
+
+    def __init__(self, metrics=None, k=SKETCH_K):
+        self.metrics = list(metrics or AUTHOR_METRICS)
+        self.summaries = {m: MetricSummary(k=k) for m in self.metrics}
+
+    def add_author(self, record):
+        """Accumulate one author record (dict or pandas row)."""
+        # Google Scholar placeholders carry zeros instead of real OpenAlex metrics
+        if str(record.get("id") or "").rstrip("/").split("/")[-1].startswith("GS_"):
+            return
+        for metric in self.metrics:
+            value = _to_number(record.get(metric))
+            if value is not None:
+                self.summaries[metric].add(value)
+
+    def merge(self, other):
+        for metric, summary in other.summaries.items():
+            if metric not in self.summaries:
+                self.metrics.append(metric)
+                self.summaries[metric] = summary
+            else:
+                self.summaries[metric].merge(summary)
+        return self
+
+    def percentile_rank(self, metric, value):
+        """Percentile (0-100) of a value within the field distribution."""
+        return round(self.summaries[metric].sketch.rank(value) * 100, 1)
+
+    def percentile_table(self, percentiles=PERCENTILES):
+        """Build the exported table: {metric: {count, mean, std, min, max, median, percentiles}}."""
+        table = {}
+        for metric in self.metrics:
+            summary = self.summaries[metric]
+            moments = summary.moments
+            if not moments.count:
+                continue
+            values = summary.sketch.quantiles([p / 100 for p in percentiles])
+            table[metric] = {
+                "count": moments.count,
+                "mean": round(moments.mean, 2),
+                "std": round(moments.std, 2),
+                "min": moments.min,
+                "max": moments.max,
+                "median": summary.sketch.quantile(0.5),
+                "percentiles": {f"p{p}": v for p, v in zip(percentiles, values)},
+            }
+        return table
+
+    def to_dict(self):
+        return {
+            m: {"moments": s.moments.to_dict(), "sketch": s.sketch.to_dict()}
+            for m, s in self.summaries.items()
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        stats = cls(metrics=list(data))
+        for metric, state in data.items():
+            summary = stats.summaries[metric]
+            summary.moments = RunningMoments.from_dict(state["moments"])
+            summary.sketch = KLLSketch.from_dict(state["sketch"])
+        return stats
+
+
+def _to_number(value):
+    """Convert a CSV/JSON cell to float, skipping blanks and NaN."""
+    if value is None or value == "":
+        return None
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    if number != number:  # NaN check
+        return None
+    return number
+
+
+def stream_csv(path, metrics=None):
+    """Accumulate statistics from a CSV file row by row (constant memory)."""
+    stats = FieldStatistics(metrics)
+    with open(path, encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            stats.add_author(row)
+    return stats
+
+
+def _stream_csv_state(args):
+    path, metrics = args
+    return stream_csv(path, metrics).to_dict()
+
+
+def compute_parallel(paths, metrics=None, workers=4):
+    """Stream several CSV shards in worker processes and merge the sketches."""
+    merged = FieldStatistics(metrics)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for state in pool.map(_stream_csv_state, [(p, metrics) for p in paths]):
+            merged.merge(FieldStatistics.from_dict(state))
+    return merged
+
+
+def export_percentile_table(stats, output_path="../scholar-viz/src/data/fieldStats.json"):
+    """Write the percentile table as JSON for the site."""
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(stats.percentile_table(), f, ensure_ascii=False, indent=2)
+    print(f"Field statistics saved to {output_path}")
+
+
+def print_summary(stats):
+    """Print a short report in the same layout as analyze_authors."""
+    for metric, row in stats.percentile_table().items():
+        print(f"\n## {metric}")
+        print(f"  Count: {row['count']:,} | Mean: {row['mean']:,.1f} | Median: {row['median']:,.1f} | Max: {row['max']:,.0f}")
+        print(f"  P90: {row['percentiles']['p90']:,.1f} | P99: {row['percentiles']['p99']:,.1f}")
+
+
+def main():
+    args = sys.argv[1:]
+    workers = 1
+    if "--workers" in args:
+        idx = args.index("--workers")
+        workers = int(args[idx + 1])
+        del args[idx:idx + 2]
+    paths = args or ["../data/comp_neuro_scholars_raw.csv"]
+
+    print("=" * 60)
+    print("Streaming Field Statistics")
+    print("=" * 60)
+
+    if workers > 1 and len(paths) > 1:
+        stats = compute_parallel(paths, workers=workers)
+    else:
+        stats = FieldStatistics()
+        for path in paths:
+            stats.merge(stream_csv(path))
+
+    print_summary(stats)
+    export_percentile_table(stats)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Topic Classifier
+
+Assign each scholar a research category from a data-driven taxonomy
+(../data/taxonomy.json). The taxonomy uses the site's category vocabulary
+(the labels in ../data/scholar_categories.csv), so automatic and curated
+categories can be mixed freely. Every category lists weighted patterns; all
+patterns are compiled into one regex trie, so each concept name is scanned
+once no matter how many patterns the taxonomy has. Scores are weighted by
+the author's own concept scores (x_concepts score, topic counts), and
+classification runs as one vectorized batch over all authors: unique
+concept names are matched once and joined back with explode / merge /
+groupby. Changing the taxonomy only requires re-running the classifier.
+
+Usage:
+    python topic_classifier.py [../data/comp_neuro_scholars_analyzed.csv] [--output PATH]
+
+Dependencies:
+    pip install pandas
+"""
+
+import json
+import os
+import re
+import sys
+import unicodedata
+
+import pandas as pd
+
+TAXONOMY_PATH = "../data/taxonomy.json"
+DEFAULT_INPUT = "../data/comp_neuro_scholars_analyzed.csv"
+# Curated site categories (id, category) used to measure agreement
+CATEGORIES_PATH = "../data/scholar_categories.csv"
+# Weight of the n-th concept when only ranked names (no scores) are available
+RANK_WEIGHTS = [1.0, 0.85, 0.7, 0.55, 0.4]
+
+_non_word = re.compile(r"[^0-9a-z]+")
+
+
+def normalize(text):
+    """Fold diacritics, lowercase and collapse punctuation to single spaces."""
+    decomposed = unicodedata.normalize("NFKD", str(text))
+    folded = "".join(c for c in decomposed if not unicodedata.combining(c)).lower()
+    return _non_word.sub(" ", folded).strip()
+
+
+def trie_regex(words):
+    """Compile words into a single regex trie; longer matches win at each position."""
+    trie = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = True
+
+    def pattern(node):
+        end = "" in node
+        branches = [re.escape(ch) + pattern(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if end:
+            body = "(?:" + body + ")?"
+        return body
+
+    return re.compile(r"(?<![0-9a-z])" + pattern(trie) + r"(?![0-9a-z])")
+
+
+class TopicClassifier:
+    """Weighted multi-pattern classifier compiled from a taxonomy."""
+
+    def __init__(self, taxonomy):
+        self.categories = [c["name"] for c in taxonomy["categories"]]
+        self.default = taxonomy.get("default", "Other")
+        self.min_score = taxonomy.get("min_score", 0.0)
+
+        # normalized pattern -> [(category index, weight)]
+        self.patterns = {}
+        for idx, category in enumerate(taxonomy["categories"]):
+            for pattern, weight in category["patterns"].items():
+                self.patterns.setdefault(normalize(pattern), []).append((idx, float(weight)))
+        self.regex = trie_regex(self.patterns)
+        self._cache = {}
+
+    @classmethod
+    def from_file(cls, path=TAXONOMY_PATH):
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def match(self, concept):
+        """Category index -> summed pattern weight for one concept name (memoized)."""
+        hits = self._cache.get(concept)
+        if hits is None:
+            hits = {}
+            for m in self.regex.finditer(normalize(concept)):
+                for idx, weight in self.patterns[m.group(0)]:
+                    hits[idx] = hits.get(idx, 0.0) + weight
+            self._cache[concept] = hits
+        return hits
+
+    def classify(self, weighted_concepts):
+        """Classify a Series of [(concept name, weight), ...] lists; returns a Series of categories."""
+        pairs = weighted_concepts.explode().dropna()
+        if pairs.empty:
+            return pd.Series(self.default, index=weighted_concepts.index)
+        long = pd.DataFrame(pairs.tolist(), columns=["concept", "concept_weight"], index=pairs.index)
+        long.index.name = "row"
+        long = long.reset_index()
+
+        # Match each distinct concept once, then join the hits back to every author
+        hits = [(concept, idx, weight)
+                for concept in long["concept"].unique()
+                for idx, weight in self.match(concept).items()]
+        hits = pd.DataFrame(hits, columns=["concept", "category_idx", "pattern_weight"])
+        scored = long.merge(hits, on="concept")
+        scored["score"] = scored["concept_weight"] * scored["pattern_weight"]
+
+        totals = scored.groupby(["row", "category_idx"], as_index=False)["score"].sum()
+        # Highest score wins; ties go to the category listed first in the taxonomy
+        best = (totals.sort_values(["row", "score", "category_idx"], ascending=[True, False, True])
+                      .drop_duplicates("row")
+                      .set_index("row"))
+        best = best[best["score"] >= self.min_score]
+
+        categories = pd.Series(self.default, index=weighted_concepts.index)
+        categories.loc[best.index] = [self.categories[i] for i in best["category_idx"]]
+        return categories
+
+
+def weighted_concepts(author_data):
+    """[(name, weight)] from a raw OpenAlex author: x_concepts scores plus topic counts."""
+    pairs = [(c.get("display_name", ""), (c.get("score") or 0) / 100)
+             for c in author_data.get("x_concepts") or []]
+    topics = author_data.get("topics") or []
+    if topics:
+        top_count = max(t.get("count") or 0 for t in topics) or 1
+        pairs += [(t.get("display_name", ""), (t.get("count") or 0) / top_count) for t in topics]
+    return [(name, weight) for name, weight in pairs if name and weight > 0]
+
+
+def weighted_from_columns(authors_df):
+    """Weighted concept lists from the CSV columns: top_concept_scores if present, else rank weights."""
+    names = authors_df["top_concepts"].fillna("").astype(str).map(
+        lambda s: [c.strip() for c in s.split(",") if c.strip()])
+    if "top_concept_scores" in authors_df.columns:
+        scores = authors_df["top_concept_scores"].fillna("").astype(str).map(
+            lambda s: [float(x) / 100 for x in s.split(",") if x.strip()])
+        return pd.Series([list(zip(n, s)) if len(n) == len(s) else list(zip(n, RANK_WEIGHTS))
+                          for n, s in zip(names, scores)], index=authors_df.index)
+    return names.map(lambda n: list(zip(n, RANK_WEIGHTS)))
+
+
+def main():
+    args = sys.argv[1:]
+    output = None
+    if "--output" in args:
+        idx = args.index("--output")
+        output = args[idx + 1]
+        del args[idx:idx + 2]
+    input_path = args[0] if args else DEFAULT_INPUT
+
+    classifier = TopicClassifier.from_file()
+    print(f"Taxonomy: {len(classifier.categories)} categories, {len(classifier.patterns)} patterns")
+
+    df = pd.read_csv(input_path)
+    categories = classifier.classify(weighted_from_columns(df))
+    if os.path.exists(CATEGORIES_PATH) and "id" in df.columns:
+        curated = df["id"].map(dict(pd.read_csv(CATEGORIES_PATH).values))
+        labeled = curated.notna()
+        if labeled.any():
+            agreement = (categories[labeled] == curated[labeled]).mean() * 100
+            baseline = (curated[labeled] == classifier.default).mean() * 100
+            print(f"Agreement with site categories: {agreement:.1f}% of {labeled.sum()} "
+                  f"(default alone: {baseline:.1f}%)")
+    df["category"] = categories
+
+    print(f"\nClassified {len(df)} scholars ({len(classifier._cache)} distinct concepts):")
+    for cat, count in df["category"].value_counts().items():
+        print(f"  {cat}: {count}")
+
+    if output:
+        df.to_csv(output, index=False, encoding="utf-8")
+        print(f"\nSaved to {output}")
+
+
+if __name__ == "__main__":
+    main()
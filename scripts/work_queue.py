@@ -0,0 +1,381 @@
+#!/usr/bin/env python3
+"""
+Distributed Crawl Work Queue
+
+Durable task queue for fetching stages. Author IDs for a stage are enqueued
+once per crawl; any number of worker processes lease tasks with a
+visibility timeout, write results into the shared ScholarStore and
+acknowledge them. Tasks whose worker crashed become visible again after the
+timeout and are retried up to max_attempts. Enqueueing a task that is
+already done or failed resets it to pending, so the same queue serves every
+later refresh crawl.
+
+Backends:
+    SQLite (default)      ../data/work_queue.db        (processes on one machine)
+    Redis-compatible      --backend redis://localhost:6379/0  (workers on several machines)
+
+Usage:
+    python work_queue.py enqueue works [csv_path]
+    python work_queue.py worker [--stages author,works] [--exit-when-empty]
+    python work_queue.py spawn --workers 4        # local worker processes
+    python work_queue.py status
+
+Dependencies:
+    pip install requests pandas
+    pip install redis   # optional, for the Redis backend
+"""
+
+import argparse
+import json
+import os
+import socket
+import sqlite3
+import time
+from multiprocessing import Process
+
+import pandas as pd
+
+from openalex_client import enable_archive, get_author, get_author_works_all, short_id
+from scholar_store import ScholarStore
+
+QUEUE_PATH = "../data/work_queue.db"
+VISIBILITY_TIMEOUT = 300
+MAX_ATTEMPTS = 3
+RETRY_DELAY = 30
+POLL_INTERVAL = 2.0
+
+
+class Task:
+    def __init__(self, task_id, stage, payload, attempts):
+        self.id = task_id
+        self.stage = stage
+        self.payload = payload
+        self.attempts = attempts
+
+    def __repr__(self):
+        return f"Task({self.id}, {self.stage}, {self.payload}, attempts={self.attempts})"
+
+
+class SQLiteQueue:
+    """File-based queue for many worker processes on one machine.
+
+    SQLite locking is not reliable on network filesystems; use the Redis
+    backend when workers run on several machines.
+    """
+
+    def __init__(self, path=QUEUE_PATH):
+        self.path = path
+        conn = self._connect()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS tasks (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                stage TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                max_attempts INTEGER NOT NULL,
+                visible_at REAL NOT NULL DEFAULT 0,
+                worker TEXT,
+                error TEXT,
+                updated_at REAL,
+                UNIQUE(stage, payload)
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_tasks_lease ON tasks(stage, status, visible_at)")
+        conn.close()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def enqueue(self, stage, payloads, max_attempts=MAX_ATTEMPTS):
+        """Add tasks. Pending or leased duplicates are ignored; done or failed tasks are
+        reset to pending for a new crawl. Returns the number added or reset."""
+        conn = self._connect()
+        before = conn.total_changes
+        conn.execute("BEGIN")
+        conn.executemany(
+            """INSERT INTO tasks (stage, payload, max_attempts, updated_at) VALUES (?, ?, ?, ?)
+               ON CONFLICT(stage, payload) DO UPDATE SET
+                   status = 'pending', attempts = 0, max_attempts = excluded.max_attempts,
+                   visible_at = 0, worker = NULL, error = NULL, updated_at = excluded.updated_at
+               WHERE status IN ('done', 'failed')""",
+            [(stage, p, max_attempts, time.time()) for p in payloads],
+        )
+        conn.execute("COMMIT")
+        added = conn.total_changes - before
+        conn.close()
+        return added
+
+    def lease(self, stages, worker, visibility_timeout=VISIBILITY_TIMEOUT):
+        """Atomically claim one visible task from any of the stages."""
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            marks = ",".join("?" for _ in stages)
+            row = conn.execute(
+                f"""SELECT id, stage, payload, attempts FROM tasks
+                    WHERE stage IN ({marks}) AND status IN ('pending', 'leased')
+                      AND visible_at <= ? AND attempts < max_attempts
+                    ORDER BY id LIMIT 1""",
+                (*stages, now),
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                """UPDATE tasks SET status = 'leased', attempts = attempts + 1,
+                       visible_at = ?, worker = ?, updated_at = ? WHERE id = ?""",
+                (now + visibility_timeout, worker, now, row[0]),
+            )
+            conn.execute("COMMIT")
+            return Task(row[0], row[1], row[2], row[3] + 1)
+        finally:
+            conn.close()
+
+    def ack(self, task):
+        conn = self._connect()
+        conn.execute("UPDATE tasks SET status = 'done', updated_at = ? WHERE id = ?", (time.time(), task.id))
+        conn.close()
+
+    def fail(self, task, error, retry_delay=RETRY_DELAY):
+        """Record a failure; the task becomes visible again unless attempts are exhausted."""
+        now = time.time()
+        conn = self._connect()
+        conn.execute(
+            """UPDATE tasks SET
+                   status = CASE WHEN attempts >= max_attempts THEN 'failed' ELSE 'pending' END,
+                   visible_at = ?, error = ?, updated_at = ? WHERE id = ?""",
+            (now + retry_delay, str(error)[:500], now, task.id),
+        )
+        conn.close()
+
+    def extend(self, task, visibility_timeout=VISIBILITY_TIMEOUT):
+        """Heartbeat for long-running tasks."""
+        conn = self._connect()
+        conn.execute("UPDATE tasks SET visible_at = ? WHERE id = ?", (time.time() + visibility_timeout, task.id))
+        conn.close()
+
+    def counts(self):
+        """{stage: {status: n}}; leases that expired on their last attempt count as failed."""
+        conn = self._connect()
+        conn.execute(
+            """UPDATE tasks SET status = 'failed'
+               WHERE status = 'leased' AND visible_at <= ? AND attempts >= max_attempts""",
+            (time.time(),),
+        )
+        result = {}
+        for stage, status, n in conn.execute("SELECT stage, status, COUNT(*) FROM tasks GROUP BY stage, status"):
+            result.setdefault(stage, {})[status] = n
+        conn.close()
+        return result
+
+
+class RedisQueue:
+    """Redis-compatible backend: pending list + leased sorted set (score = visibility deadline).
+
+    The seen set holds payloads that are pending or leased; it is cleared on
+    ack and on final failure so a later crawl can enqueue them again.
+    """
+
+    STAGES_KEY = "scholar_queue:stages"
+    LEASE_SCRIPT = """
+        local now = tonumber(ARGV[1])
+        local deadline = now + tonumber(ARGV[2])
+        local default_max = tonumber(ARGV[3])
+        for _, id in ipairs(redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', now)) do
+            redis.call('ZREM', KEYS[2], id)
+            local max_attempts = tonumber(redis.call('HGET', KEYS[6], id) or default_max)
+            if tonumber(redis.call('HGET', KEYS[3], id) or '0') < max_attempts then
+                redis.call('RPUSH', KEYS[1], id)
+            else
+                redis.call('SADD', KEYS[4], id)
+                redis.call('SREM', KEYS[5], id)
+            end
+        end
+        local id = redis.call('LPOP', KEYS[1])
+        if not id then return nil end
+        redis.call('ZADD', KEYS[2], deadline, id)
+        return {id, redis.call('HINCRBY', KEYS[3], id, 1)}
+    """
+
+    def __init__(self, url):
+        import redis
+        self.client = redis.Redis.from_url(url, decode_responses=True)
+        self._lease = self.client.register_script(self.LEASE_SCRIPT)
+
+    @staticmethod
+    def _keys(stage):
+        prefix = f"scholar_queue:{stage}"
+        return [f"{prefix}:pending", f"{prefix}:leased", f"{prefix}:attempts", f"{prefix}:failed", f"{prefix}:seen",
+                f"{prefix}:done", f"{prefix}:max_attempts"]
+
+    def enqueue(self, stage, payloads, max_attempts=MAX_ATTEMPTS):
+        """Add tasks; pending or leased duplicates are ignored, done / failed ones start over."""
+        pending, _, attempts, failed, seen, done, max_key = self._keys(stage)
+        self.client.sadd(self.STAGES_KEY, stage)
+        added = 0
+        for payload in payloads:
+            if self.client.sadd(seen, payload):
+                self.client.srem(done, payload)
+                self.client.srem(failed, payload)
+                self.client.hdel(attempts, payload)
+                self.client.hset(max_key, payload, max_attempts)
+                self.client.rpush(pending, payload)
+                added += 1
+        return added
+
+    def lease(self, stages, worker, visibility_timeout=VISIBILITY_TIMEOUT):
+        for stage in stages:
+            pending, leased, attempts, failed, seen, _, max_key = self._keys(stage)
+            result = self._lease(keys=[pending, leased, attempts, failed, seen, max_key],
+                                 args=[time.time(), visibility_timeout, MAX_ATTEMPTS])
+            if result:
+                return Task(result[0], stage, result[0], int(result[1]))
+        return None
+
+    def ack(self, task):
+        _, leased, _, _, seen, done, _ = self._keys(task.stage)
+        self.client.zrem(leased, task.id)
+        self.client.sadd(done, task.id)
+        self.client.srem(seen, task.id)
+
+    def fail(self, task, error, retry_delay=RETRY_DELAY):
+        # Leave it leased with a short deadline; the lease script requeues or fails it
+        leased = self._keys(task.stage)[1]
+        self.client.zadd(leased, {task.id: time.time() + retry_delay})
+
+    def extend(self, task, visibility_timeout=VISIBILITY_TIMEOUT):
+        leased = self._keys(task.stage)[1]
+        self.client.zadd(leased, {task.id: time.time() + visibility_timeout})
+
+    def counts(self):
+        result = {}
+        for stage in self.client.smembers(self.STAGES_KEY):
+            pending, leased, _, failed, _, done, _ = self._keys(stage)
+            result[stage] = {
+                "pending": self.client.llen(pending),
+                "leased": self.client.zcard(leased),
+                "done": self.client.scard(done),
+                "failed": self.client.scard(failed),
+            }
+        return result
+
+
+def open_queue(backend=None):
+    if backend and backend.startswith("redis://"):
+        return RedisQueue(backend)
+    return SQLiteQueue(backend or QUEUE_PATH)
+
+
+# Stage handlers: payload is a short author ID, results go to the shared store
+
+def handle_author(author_id, store, email=None):
+    data = get_author(author_id, email)
+    if data is None:
+        raise RuntimeError(f"cannot fetch author {author_id}")
+    store.put_author(data)
+
+
+def handle_works(author_id, store, email=None):
+    works = get_author_works_all(author_id, email)
+    if works is None:
+        raise RuntimeError(f"incomplete works download for {author_id}")
+    store.put_works(author_id, works)
+
+
+STAGE_HANDLERS = {
+    "author": handle_author,
+    "works": handle_works,
+}
+
+
+def author_ids_from_csv(path):
+    """OpenAlex author IDs from a scholars CSV (Google Scholar placeholders are skipped)."""
+    df = pd.read_csv(path)
+    return [short_id(i) for i in df["id"] if not short_id(i).startswith("GS_")]
+
+
+def run_worker(stages, backend=None, store_dir=None, email=None, exit_when_empty=False):
+    """Lease and process tasks until interrupted (or until the queue drains)."""
+    queue = open_queue(backend)
+    store = ScholarStore(store_dir) if store_dir else ScholarStore()
+    enable_archive()
+    worker = f"{socket.gethostname()}:{os.getpid()}"
+    processed = 0
+
+    while True:
+        task = queue.lease(stages, worker)
+        if task is None:
+            if exit_when_empty:
+                active = sum(
+                    c.get("pending", 0) + c.get("leased", 0)
+                    for s, c in queue.counts().items() if s in stages
+                )
+                if not active:
+                    break
+            time.sleep(POLL_INTERVAL)
+            continue
+
+        try:
+            STAGE_HANDLERS[task.stage](task.payload, store, email)
+            queue.ack(task)
+            processed += 1
+        except Exception as e:
+            print(f"[{worker}] {task} failed: {e}")
+            queue.fail(task, e)
+
+    print(f"[{worker}] processed {processed} tasks")
+    return processed
+
+
+def spawn_local_workers(n, stages, backend=None, store_dir=None, email=None):
+    """Start n worker processes on this machine and wait until the queue drains."""
+    processes = [
+        Process(target=run_worker, args=(stages, backend, store_dir, email, True))
+        for _ in range(n)
+    ]
+    for p in processes:
+        p.start()
+    for p in processes:
+        p.join()
+
+
+def main():
+    from fetch_comp_neuro_scholars import EMAIL
+
+    parser = argparse.ArgumentParser(description="Distributed crawl work queue")
+    parser.add_argument("--backend", help="SQLite path or redis:// URL (default: %(default)s)", default=QUEUE_PATH)
+    parser.add_argument("--store", help="ScholarStore directory", default=None)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_enqueue = sub.add_parser("enqueue")
+    p_enqueue.add_argument("stage", choices=sorted(STAGE_HANDLERS))
+    p_enqueue.add_argument("csv_path", nargs="?", default="../data/comp_neuro_scholars_raw.csv")
+
+    for name in ("worker", "spawn"):
+        p = sub.add_parser(name)
+        p.add_argument("--stages", default=",".join(STAGE_HANDLERS))
+        if name == "worker":
+            p.add_argument("--exit-when-empty", action="store_true")
+        else:
+            p.add_argument("--workers", type=int, default=4)
+
+    sub.add_parser("status")
+    args = parser.parse_args()
+
+    if args.command == "enqueue":
+        added = open_queue(args.backend).enqueue(args.stage, author_ids_from_csv(args.csv_path))
+        print(f"Enqueued {added} '{args.stage}' tasks")
+    elif args.command == "worker":
+        run_worker(args.stages.split(","), args.backend, args.store, EMAIL, args.exit_when_empty)
+    elif args.command == "spawn":
+        spawn_local_workers(args.workers, args.stages.split(","), args.backend, args.store, EMAIL)
+    elif args.command == "status":
+        print(json.dumps(open_queue(args.backend).counts(), indent=2))
+
+
+if __name__ == "__main__":
+    main()